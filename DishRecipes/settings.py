@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 from os import path
 from django.contrib.messages import constants as messages
+from django.core.exceptions import ImproperlyConfigured
 
 from decouple import config, Csv
 
@@ -35,6 +36,8 @@ ALLOWED_HOSTS = config("ALLOWED_HOSTS", cast=Csv(), default="localhost")
 
 INSTALLED_APPS = [
     "custom",
+    "jobs",
+    "storage",
     "accounts",
     "recipes",
     "django.contrib.admin",
@@ -50,6 +53,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "custom.db.middleware.ReadYourWritesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -84,15 +88,67 @@ WSGI_APPLICATION = "DishRecipes.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": config("DB_ENGINE", default="django.db.backends.sqlite3"),
+        "ENGINE": config("DB_ENGINE", default="custom.db.backends.sqlite3"),
         "NAME": config("DB_NAME", default=BASE_DIR / "db.sqlite3"),
         "USER": config("DB_USER", default=""),
         "PASSWORD": config("DB_PASSWORD", default=""),
         "HOST": config("DB_HOST", default=""),
         "PORT": config("DB_PORT", cast=int, default="0"),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", cast=int, default=0),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", cast=bool, default=False),
+        "OPTIONS": {},
     }
 }
 
+# SQLite: WAL lets readers run next to a writer, and reads go through a read-only connection.
+SQLITE_PRAGMAS = {
+    "busy_timeout": config("DB_SQLITE_BUSY_TIMEOUT", cast=int, default=5000),
+    "cache_size": config("DB_SQLITE_CACHE_SIZE", cast=int, default=-32000),
+    "mmap_size": config("DB_SQLITE_MMAP_SIZE", cast=int, default=128 * 1024 * 1024),
+    "temp_store": "MEMORY",
+}
+if DATABASES["default"]["ENGINE"] == "custom.db.backends.sqlite3":
+    DATABASES["default"]["OPTIONS"] = {
+        "pragmas": {"journal_mode": "WAL", "synchronous": "NORMAL", **SQLITE_PRAGMAS},
+        "transaction_mode": "IMMEDIATE",
+    }
+    if config("DB_SQLITE_READ_ONLY_ALIAS", cast=bool, default=True):
+        DATABASES["readonly"] = {
+            **DATABASES["default"],
+            "OPTIONS": {"pragmas": SQLITE_PRAGMAS, "read_only": True},
+            "TEST": {"MIRROR": "default"},
+        }
+
+# Pooled PostgreSQL connections (requires psycopg_pool); DB_CONN_MAX_AGE must stay 0 with a pool.
+if config("DB_POOL", cast=bool, default=False):
+    if DATABASES["default"]["ENGINE"] != "django.db.backends.postgresql":
+        raise ImproperlyConfigured("DB_POOL requires DB_ENGINE=django.db.backends.postgresql.")
+    DATABASES["default"]["ENGINE"] = "custom.db.backends.postgresql_pool"
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", cast=int, default=2),
+        "max_size": config("DB_POOL_MAX_SIZE", cast=int, default=10),
+        "timeout": config("DB_POOL_TIMEOUT", cast=float, default=30.0),
+        "max_idle": config("DB_POOL_MAX_IDLE", cast=float, default=600.0),
+        "max_lifetime": config("DB_POOL_MAX_LIFETIME", cast=float, default=3600.0),
+    }
+
+# Read replicas: one entry per replica, the HOST[:PORT] of a server or the file of a SQLite copy.
+# Reads go to a replica until the session writes, then stay on the primary for the rest of the
+# request and for DB_REPLICA_PIN_SECONDS afterwards.
+for index, location in enumerate(config("DB_REPLICAS", cast=Csv(), default="")):
+    replica = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if replica["ENGINE"] == "custom.db.backends.sqlite3":
+        replica.update(NAME=location, OPTIONS={"pragmas": SQLITE_PRAGMAS, "read_only": True})
+    else:
+        host, _, port = location.partition(":")
+        replica.update(HOST=host, PORT=int(port) if port else DATABASES["default"]["PORT"])
+    DATABASES[f"replica_{index}"] = replica
+    DATABASES.pop("readonly", None)
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["custom.db.routers.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = config("DB_REPLICA_PIN_SECONDS", cast=int, default=5)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -164,6 +220,111 @@ AZURE_CUSTOM_DOMAIN = config("AZURE_CUSTOM_DOMAIN", default="")
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Deferred field guard
+
+RAISE_ON_DEFERRED_FIELD_ACCESS = config("RAISE_ON_DEFERRED_FIELD_ACCESS", cast=bool, default=False)
+
+# Testing
+
+TEST_RUNNER = "custom.testing.TestRunner"
+
+# Image variants
+
+IMAGE_VARIANTS_ENABLED = config("IMAGE_VARIANTS_ENABLED", cast=bool, default=True)
+IMAGE_VARIANT_SIZES = config("IMAGE_VARIANT_SIZES", cast=Csv(int), default="80,160,200,400")
+IMAGE_VARIANT_QUALITY = config("IMAGE_VARIANT_QUALITY", cast=int, default=80)
+
+# Storage URL cache
+
+STORAGE_URL_CACHE_SIZE = config("STORAGE_URL_CACHE_SIZE", cast=int, default=1024)
+STORAGE_URL_CACHE_TIMEOUT = config("STORAGE_URL_CACHE_TIMEOUT", cast=int, default=3600)
+STORAGE_URL_FAILURE_TIMEOUT = config("STORAGE_URL_FAILURE_TIMEOUT", cast=int, default=30)
+STORAGE_URL_SHARED_CACHE = config("STORAGE_URL_SHARED_CACHE", default="")
+
+# Image uploads
+
+IMAGE_UPLOAD_MAX_SIZE = config("IMAGE_UPLOAD_MAX_SIZE", cast=int, default=10 * 1024 * 1024)
+IMAGE_UPLOAD_MAX_DIMENSION = config("IMAGE_UPLOAD_MAX_DIMENSION", cast=int, default=8000)
+IMAGE_UPLOAD_MAX_PIXELS = config("IMAGE_UPLOAD_MAX_PIXELS", cast=int, default=40_000_000)
+FILE_UPLOAD_HANDLERS = [
+    "custom.uploadhandlers.UploadSizeLimitHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Background jobs
+
+JOBS_BATCH_SIZE = config("JOBS_BATCH_SIZE", cast=int, default=10)
+JOBS_MAX_ATTEMPTS = config("JOBS_MAX_ATTEMPTS", cast=int, default=5)
+JOBS_RETRY_BACKOFF = config("JOBS_RETRY_BACKOFF", cast=int, default=30)
+JOBS_RETRY_BACKOFF_MAX = config("JOBS_RETRY_BACKOFF_MAX", cast=int, default=3600)
+JOBS_LOCK_TIMEOUT = config("JOBS_LOCK_TIMEOUT", cast=int, default=300)
+JOBS_POLL_INTERVAL = config("JOBS_POLL_INTERVAL", cast=float, default=2.0)
+
+# Orphaned media collection
+
+MEDIA_GC_BATCH_SIZE = config("MEDIA_GC_BATCH_SIZE", cast=int, default=500)
+MEDIA_GC_GRACE_PERIOD = config("MEDIA_GC_GRACE_PERIOD", cast=int, default=24 * 60 * 60)
+
+# Caches
+# Every alias is an in-process LRU tier in front of a shared tier. The shared tier defaults to files under
+# BASE_DIR / "cache"; use django.core.cache.backends.redis.RedisCache with a redis:// location (requires redis)
+# or django.core.cache.backends.db.DatabaseCache with a table name (requires createcachetable) to share it
+# between hosts. File-based shared tiers get one subdirectory per alias, so culling and clear() stay within it.
+CACHE_SHARED_BACKEND = config("CACHE_SHARED_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache")
+CACHE_SHARED_LOCATION = config("CACHE_SHARED_LOCATION", default=str(BASE_DIR / "cache"))
+CACHE_SHARED_FILE_BASED = CACHE_SHARED_BACKEND == "django.core.cache.backends.filebased.FileBasedCache"
+CACHE_SHARED_MAX_ENTRIES = config("CACHE_SHARED_MAX_ENTRIES", cast=int, default=3000)
+CACHE_KEY_PREFIX = config("CACHE_KEY_PREFIX", default="dishrecipes")
+CACHE_LOCAL_MAX_ENTRIES = config("CACHE_LOCAL_MAX_ENTRIES", cast=int, default=1000)
+CACHE_LOCAL_TIMEOUT = config("CACHE_LOCAL_TIMEOUT", cast=int, default=30)
+CACHE_TIMEOUTS = {
+    "default": config("CACHE_DEFAULT_TIMEOUT", cast=int, default=300),
+    "fragments": config("CACHE_FRAGMENTS_TIMEOUT", cast=int, default=3600),
+    "computed": config("CACHE_COMPUTED_TIMEOUT", cast=int, default=300),
+}
+CACHE_LOCK_TIMEOUT = config("CACHE_LOCK_TIMEOUT", cast=int, default=10)
+CACHE_LOCK_POLL_INTERVAL = config("CACHE_LOCK_POLL_INTERVAL", cast=float, default=0.05)
+
+CACHES = {
+    alias: {
+        "BACKEND": "custom.cache.TieredCache",
+        "LOCATION": path.join(CACHE_SHARED_LOCATION, alias) if CACHE_SHARED_FILE_BASED else CACHE_SHARED_LOCATION,
+        "TIMEOUT": timeout,
+        "KEY_PREFIX": f"{CACHE_KEY_PREFIX}:{alias}",
+        "OPTIONS": {
+            "SHARED_BACKEND": CACHE_SHARED_BACKEND,
+            "SHARED_OPTIONS": {"MAX_ENTRIES": CACHE_SHARED_MAX_ENTRIES} if CACHE_SHARED_FILE_BASED else {},
+            "LOCAL_MAX_ENTRIES": CACHE_LOCAL_MAX_ENTRIES,
+            "LOCAL_TIMEOUT": CACHE_LOCAL_TIMEOUT,
+        },
+    }
+    for alias, timeout in CACHE_TIMEOUTS.items()
+}
+
+# HTTP caching
+
+HTTP_CACHE_MAX_AGE = config("HTTP_CACHE_MAX_AGE", cast=int, default=0)
+
+# Pagination
+
+PAGINATE_BY_MAX = config("PAGINATE_BY_MAX", cast=int, default=50)
+
+# Popular recipes
+
+POPULAR_RECIPES_MIN_REVIEWS = config("POPULAR_RECIPES_MIN_REVIEWS", cast=int, default=3)
+POPULAR_RECIPES_PRIOR_MEAN = config("POPULAR_RECIPES_PRIOR_MEAN", cast=float, default=3.0)
+POPULAR_RECIPES_PRIOR_WEIGHT = config("POPULAR_RECIPES_PRIOR_WEIGHT", cast=float, default=5.0)
+
+# Search
+
+SEARCH_CONFIG = config("SEARCH_CONFIG", default="english")
+SEARCH_RESULTS_LIMIT = config("SEARCH_RESULTS_LIMIT", cast=int, default=100)
+
+# Recipe import
+
+RECIPE_IMPORT_BATCH_SIZE = config("RECIPE_IMPORT_BATCH_SIZE", cast=int, default=1000)
+
 # Crispy Forms
 
 CRISPY_TEMPLATE_PACK = "bootstrap4"
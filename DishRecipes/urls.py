@@ -20,6 +20,8 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from storage.views import serve_media
+
 urlpatterns = (
     [
         path("", include("recipes.urls")),
@@ -27,5 +29,5 @@ urlpatterns = (
         path("accounts/", include("accounts.urls")),
     ]
     + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    + static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
 )
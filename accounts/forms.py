@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError as ValidationError
 from django.forms import ModelForm, CharField, PasswordInput, Textarea
 from django.utils.translation import gettext_lazy as _
 
+from custom.fields import LimitedImageField
 from custom.widgets import widgets
 from .models import CustomUser
 
@@ -21,6 +22,7 @@ class UserProfileForm(ModelForm):
         model = CustomUser
         fields = ("profile_image", "profile_bio")
         labels = ({"profile_image": "", "profile_bio": "Your bio"},)
+        field_classes = {"profile_image": LimitedImageField}
         widgets = {
             "profile_image": widgets.get("custom_clearable_image_input"),
             "profile_bio": Textarea(),
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_customuser_profile_bio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_staff', False), ('is_superuser', False)), fields=['-date_joined'], name='user_listed_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_customuser_profile_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['profile_image'], name='user_profile_image_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
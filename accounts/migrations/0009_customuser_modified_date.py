@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_image_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -4,6 +4,9 @@ from django.utils.translation import gettext_lazy as _
 from django.core.validators import EmailValidator
 from django.conf import settings
 
+from custom.models import DeferredFieldGuardMixin
+from storage.url_cache import cached_url
+
 
 class CustomUserManager(UserManager):
     def create_user(self, username, email, password=None, **extra_fields):
@@ -29,7 +32,7 @@ class CustomUserManager(UserManager):
         return self._create_user(username, email, password, **extra_fields)
 
 
-class CustomUser(AbstractUser):
+class CustomUser(DeferredFieldGuardMixin, AbstractUser):
     email = models.EmailField(
         _("email address"),
         unique=True,
@@ -52,16 +55,25 @@ class CustomUser(AbstractUser):
         max_length=2000,
         blank=True,
     )
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    modified_date = models.DateTimeField(auto_now=True)
 
     objects = CustomUserManager()
 
     REQUIRED_FIELDS = ["email"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(
+                fields=["-date_joined"],
+                name="user_listed_joined_idx",
+                condition=models.Q(is_superuser=False, is_staff=False, is_active=True),
+            ),
+            models.Index(fields=["profile_image"], name="user_profile_image_idx", opclasses=["varchar_pattern_ops"]),
+        ]
+
     def __str__(self):
         return self.username
 
     def profile_image_url_or_default(self):
-        try:
-            return self.profile_image.url
-        except:
-            return settings.MEDIA_URL + "images/default.jpg"
+        return cached_url(self.profile_image.storage, self.profile_image.name) or settings.MEDIA_URL + "images/default.jpg"
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from custom.images import reset_uploaded_image_variants, schedule_image_variants
+from custom.pagination import invalidate_cached_counts
+from storage.references import track_media_references
+
+track_media_references(get_user_model(), "profile_image")
+
+
+@receiver(pre_save, sender=get_user_model())
+def reset_profile_image_variants(sender, instance, **kwargs):
+    reset_uploaded_image_variants(instance, "profile_image", "profile_image_variants")
+
+
+@receiver(post_save, sender=get_user_model())
+def schedule_profile_image_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance, "profile_image", "profile_image_variants")
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_counts(sender, instance, **kwargs):
+    invalidate_cached_counts(get_user_model())
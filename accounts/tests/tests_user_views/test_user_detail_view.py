@@ -2,15 +2,33 @@ from django.utils import timezone
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils.http import http_date
 
+from custom.testing import QueryBudgetTestMixin
 
-class UserDetailViewTests(TestCase):
+
+class UserDetailViewTests(QueryBudgetTestMixin, TestCase):
     def test_get_user_detail(self):
         user = get_user_model().objects.create_user(username="Test", email="test@test.com", password="Test12345")
         response = self.client.get(f"/accounts/users/{user.username}/")
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTemplateUsed(response, "users/user_detail.html")
 
+    def test_user_detail_within_query_budget(self):
+        user = get_user_model().objects.create_user(username="Test", email="test@test.com", password="Test12345")
+        self.assertWithinQueryBudget(f"/accounts/users/{user.username}/")
+
+    def test_user_detail_revalidated_against_last_login(self):
+        user = get_user_model().objects.create_user(username="Test", email="test@test.com", password="Test12345")
+        response = self.client.get(f"/accounts/users/{user.username}/")
+        self.assertEqual(response["Last-Modified"], http_date(user.modified_date.timestamp()))
+        revalidated = self.client.get(f"/accounts/users/{user.username}/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, HTTPStatus.NOT_MODIFIED)
+        self.client.login(username=user.username, password="Test12345")
+        self.client.logout()
+        revalidated = self.client.get(f"/accounts/users/{user.username}/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, HTTPStatus.OK)
+
     def test_user_detail_contains_user_data(self):
         user = get_user_model().objects.create_user(username="Test", email="test@test.com", password="Test12345")
         user.last_login = timezone.now()
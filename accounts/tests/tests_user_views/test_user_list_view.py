@@ -1,10 +1,12 @@
 import math
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
-class UserListViewTests(TestCase):
+from custom.testing import QueryBudgetTestMixin
+
+class UserListViewTests(QueryBudgetTestMixin, TestCase):
     num_of_users = 11
     paginate_by = 5
     user_list_template = "users/user_list.html"
@@ -24,6 +26,29 @@ class UserListViewTests(TestCase):
             target_status_code=HTTPStatus.OK,
         )
 
+    def test_user_list_within_query_budget(self):
+        self.assertWithinQueryBudget("/accounts/users/", data={"paginate_by": "50"})
+
+    def test_user_list_not_modified_until_a_listed_user_changes(self):
+        etag = self.client.get("/accounts/users/")["ETag"]
+        response = self.client.get("/accounts/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        user = get_user_model().objects.get(username=f"Test{self.num_of_users}")
+        user.profile_bio = "new bio"
+        user.save()
+        response = self.client.get("/accounts/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "new bio")
+
+    def test_user_list_queries_use_indexes(self):
+        self.assertQueriesUseIndexes("/accounts/users/")
+
+    @override_settings(PAGINATE_BY_MAX=10)
+    def test_user_list_paginate_by_capped(self):
+        response = self.client.get("/accounts/users/", data={"paginate_by": "1000000"})
+        self.assertEqual(response.context_data["paginator"].per_page, 10)
+        response = self.client.get("/accounts/users/", data={"paginate_by": "abc"})
+        self.assertEqual(response.context_data["paginator"].per_page, self.paginate_by)
+
     def test_get_user_list(self):
         response = self.client.get("/accounts/users/")
         self.assertEqual(response.status_code, HTTPStatus.OK)
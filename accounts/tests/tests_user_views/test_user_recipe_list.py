@@ -5,10 +5,11 @@ from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
 
+from custom.testing import QueryBudgetTestMixin
 from recipes.models import Recipe
 
 
-class UserRecipeListViewTests(TestCase):
+class UserRecipeListViewTests(QueryBudgetTestMixin, TestCase):
     num_of_user_recipes = 11
     paginate_by = 5
     user_recipe_list_template = "users/user_recipe_list.html"
@@ -36,6 +37,13 @@ class UserRecipeListViewTests(TestCase):
                 serving="test serving",
             )
 
+    def test_user_recipe_list_within_query_budget(self):
+        self.assertWithinQueryBudget(reverse("user-recipes", kwargs={"slug": "Test"}), data={"paginate_by": "50"})
+
+    def test_user_recipe_list_queries_use_indexes(self):
+        self.assertQueriesUseIndexes(reverse("user-recipes", kwargs={"slug": "Test"}))
+        self.assertQueriesUseIndexes(reverse("user-recipes", kwargs={"slug": "Test"}), data={"cursor": ""})
+
     def test_get_user_recipe_list(self):
         user = get_user_model().objects.get(pk=1)
         response = self.client.get(reverse("user-recipes", kwargs={"slug": user.username}))
@@ -10,10 +10,17 @@ from django.views.generic import CreateView, DetailView, ListView, UpdateView, F
 from django.shortcuts import HttpResponseRedirect, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
+from custom.conditional import ConditionalGetMixin, page_state, page_validators
+from custom.pagination import BoundedPaginationMixin
 from .forms import CustomUserCreationForm, UserProfileForm, UserDeactivateForm
 from recipes.models import Recipe
 
 
+def user_validators(user):
+    version = (user.pk, user.modified_date, user.last_login)
+    return version, max(filter(None, (user.modified_date, user.last_login)))
+
+
 def redirect_to_users(request):
     return HttpResponseRedirect(reverse("users"))
 
@@ -31,11 +38,12 @@ class CreateUser(CreateView):
         return HttpResponseRedirect(self.success_url)
 
 
-class UserDetail(DetailView):
+class UserDetail(ConditionalGetMixin, DetailView):
     model = get_user_model()
     template_name = "users/user_detail.html"
     context_object_name = "user_data"
     slug_field = "username"
+    query_budget = 1
 
     def get_object(self, queryset=None):
         object = super().get_object(queryset)
@@ -43,15 +51,17 @@ class UserDetail(DetailView):
             raise Http404
         return object
 
+    def get_validators(self, context=None):
+        return user_validators(self.object)
+
 
-class UserList(ListView):
+class UserList(ConditionalGetMixin, BoundedPaginationMixin, ListView):
     model = get_user_model()
     template_name = "users/user_list.html"
     context_object_name = "users"
     paginate_by = 5
-
-    def get_paginate_by(self, queryset):
-        return self.request.GET.get("paginate_by", self.paginate_by)
+    cache_count = True
+    query_budget = 2
 
     def get_queryset(self):
         queryset = (
@@ -65,10 +75,8 @@ class UserList(ListView):
         context = super().get_context_data(**kwargs)
         return context
 
-    def get(self, request, *args, **kwargs):
-        request.GET = request.GET.copy()
-        request.GET["paginate_by"] = str(self.get_paginate_by(self.get_queryset()))
-        return super().get(request, *args, **kwargs)
+    def get_validators(self, context):
+        return page_validators(context["object_list"], "modified_date", extra=page_state(context))
 
 
 class UserProfileUpdate(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
@@ -129,19 +137,19 @@ class UserDeactivate(LoginRequiredMixin, UserPassesTestMixin, SingleObjectMixin,
         return self.request.user.username == this_user.username
 
 
-class UserRecipeList(ListView):
+class UserRecipeList(ConditionalGetMixin, BoundedPaginationMixin, ListView):
     model = Recipe
     template_name = "users/user_recipe_list.html"
     user_context_object_name = "user_data"
     context_object_name = "recipes"
     slug_field = "username"
     paginate_by = 5
-
-    def get_paginate_by(self, queryset):
-        return self.request.GET.get("paginate_by", self.paginate_by)
+    cursor_fields = ("created_date", "id")
+    cache_count = True
+    query_budget = 3
 
     def get_queryset(self):
-        queryset = self.object.recipes.all().order_by("-created_date")
+        queryset = self.object.recipes.summaries().order_by("-created_date", "-id")
         return queryset
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
@@ -149,10 +157,15 @@ class UserRecipeList(ListView):
         context[self.user_context_object_name] = self.object
         return context
 
+    def get_validators(self, context):
+        user_version, _ = user_validators(self.object)
+        version, last_modified = page_validators(
+            context["object_list"], "modified_date", "rating_count", "rating_sum", extra=page_state(context)
+        )
+        return (user_version, version), last_modified
+
     def get(self, request, *args, **kwargs):
         self.object = self.get_object()
-        request.GET = request.GET.copy()
-        request.GET["paginate_by"] = str(self.get_paginate_by(self.get_queryset()))
         return super().get(request, *args, **kwargs)
 
     def get_object(self):
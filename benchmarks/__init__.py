@@ -0,0 +1,48 @@
+"""
+Standalone benchmarks for DishRecipes.
+
+Each module is run from the project root, e.g. ``python -m benchmarks.slug_allocation``.
+The benchmarks use the configured settings but run against a throwaway test database.
+"""
+
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "DishRecipes.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """Calls func repeat times and returns the median wall time in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    print("  ".join(str(header).rjust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,103 @@
+"""
+Requests per second with a new database connection per request, persistent
+connections and a psycopg_pool pool, under concurrent clients.
+
+Every mode runs in a fresh process configured through the DB_* variables.
+Requests go through the WSGI handler, so connections are closed or returned at
+the end of each request exactly as in production. The pool mode needs
+DB_ENGINE=django.db.backends.postgresql; on SQLite the test database is a WAL
+file standing in for a server.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import print_table, setup, test_database
+
+NUM_OF_RECIPES = 50
+NUM_OF_THREADS = 8
+REQUESTS_PER_THREAD = 50
+PATHS = ("/", "/recipes/")
+
+MODES = (
+    ("new connection per request", {"DB_CONN_MAX_AGE": "0", "DB_POOL": "False"}),
+    ("persistent, health checks", {"DB_CONN_MAX_AGE": "60", "DB_CONN_HEALTH_CHECKS": "True", "DB_POOL": "False"}),
+    ("psycopg_pool", {"DB_CONN_MAX_AGE": "0", "DB_CONN_HEALTH_CHECKS": "True", "DB_POOL": "True"}),
+)
+
+
+def run_mode():
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from django.test import RequestFactory
+
+    from recipes.models import Recipe
+
+    if connection.vendor == "sqlite":
+        settings.DATABASES["default"]["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+
+    with test_database():
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+        user = get_user_model().objects.create_user(username="benchmark", email="benchmark@example.com", password="benchmark")
+        Recipe.objects.bulk_create(
+            Recipe(author=user, title=f"benchmark recipe {i}", slug=f"benchmark-recipe-{i}") for i in range(NUM_OF_RECIPES)
+        )
+        connection.close()
+
+        handler = WSGIHandler()
+        environs = [RequestFactory()._base_environ(PATH_INFO=path) for path in PATHS]
+        connects = []
+        connection_created.connect(lambda **kwargs: connects.append(1), weak=False)
+
+        def client():
+            for i in range(REQUESTS_PER_THREAD):
+                response = handler(dict(environs[i % len(environs)]), lambda status, headers: None)
+                # Closing the response sends request_finished, which closes or returns the connection.
+                response.close()
+
+        threads = [threading.Thread(target=client) for _ in range(NUM_OF_THREADS)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    print(json.dumps({"requests": NUM_OF_THREADS * REQUESTS_PER_THREAD, "seconds": elapsed, "connects": len(connects)}))
+
+
+def main():
+    rows = []
+    for name, environment in MODES:
+        if environment["DB_POOL"] == "True" and os.environ.get("DB_ENGINE") != "django.db.backends.postgresql":
+            rows.append((name, "-", "-", "needs PostgreSQL"))
+            continue
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.connection_pooling", "--run-mode"],
+            env={**os.environ, **environment},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            rows.append((name, "-", "-", result.stderr.strip().splitlines()[-1]))
+            continue
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+        rows.append((name, f"{measured['requests'] / measured['seconds']:.0f}", measured["connects"], ""))
+    print_table(("connections", "requests/s", "connects", "note"), rows)
+
+
+if __name__ == "__main__":
+    if "--run-mode" in sys.argv:
+        run_mode()
+    else:
+        main()
@@ -0,0 +1,69 @@
+"""
+Request latency of creating a recipe with an uploaded photo, for photos of
+increasing size, next to the time the background worker then spends on the
+image variants. The request only stores the upload and queues a job, so its
+latency should not grow with the photo.
+"""
+
+import shutil
+import tempfile
+from io import BytesIO
+
+from benchmarks import measure, print_table, setup, test_database
+
+PHOTO_SIZES = ((640, 480), (2000, 1500), (4000, 3000))
+
+
+def jpeg(size):
+    from PIL import Image
+
+    # Noise compresses like a real photo, unlike a flat colour.
+    image = Image.effect_noise(size, 64).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def main():
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from jobs.queue import run_pending_jobs
+
+    media_root = tempfile.mkdtemp()
+    try:
+        with test_database(), override_settings(MEDIA_ROOT=media_root, IMAGE_VARIANTS_ENABLED=True):
+            get_user_model().objects.create_user(username="bench", email="bench@test.com", password="bench")
+            client = Client()
+            client.login(username="bench", password="bench")
+            url = reverse("recipe-create")
+            rows = []
+            for size in PHOTO_SIZES:
+                content = jpeg(size)
+
+                def upload():
+                    client.post(
+                        url,
+                        {
+                            "title": "benchmark recipe",
+                            "excerpt": "test",
+                            "ingredients": "test",
+                            "preparation": "test",
+                            "serving": "test",
+                            "image": SimpleUploadedFile("photo.jpg", content, content_type="image/jpeg"),
+                        },
+                    )
+
+                request_ms = measure(upload, repeat=5)
+                worker_ms = measure(lambda: run_pending_jobs(limit=1), repeat=5)
+                rows.append((f"{size[0]}x{size[1]}", f"{len(content) / 1024:.0f}", f"{request_ms:.1f}", f"{worker_ms:.1f}"))
+            print_table(("photo", "KiB", "request ms", "worker ms/job"), rows)
+    finally:
+        shutil.rmtree(media_root)
+
+
+if __name__ == "__main__":
+    main()
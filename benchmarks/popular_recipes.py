@@ -0,0 +1,54 @@
+"""
+Homepage latency with 100k reviews: the previous GROUP BY over all reviews
+against the maintained popularity_score leaderboard.
+"""
+
+import random
+
+from benchmarks import measure, print_table, setup, test_database
+
+NUM_OF_RECIPES = 5000
+NUM_OF_REVIEWS = 100_000
+
+
+def main():
+    setup()
+    from django.db.models import Avg
+    from django.test import Client
+    from django.urls import reverse
+
+    from recipes.models import Recipe, Review
+
+    with test_database():
+        Recipe.objects.bulk_create(
+            (Recipe(title=f"benchmark recipe {i}", slug=f"benchmark-recipe-{i}") for i in range(NUM_OF_RECIPES)),
+            batch_size=1000,
+        )
+        recipe_ids = list(Recipe.objects.values_list("pk", flat=True))
+        random.seed(0)
+        Review.objects.bulk_create(
+            (
+                Review(recipe_id=random.choice(recipe_ids), rating=random.randint(1, 5), content="benchmark")
+                for _ in range(NUM_OF_REVIEWS)
+            ),
+            batch_size=1000,
+        )
+        Recipe.objects.rebuild_rating_aggregates()
+
+        def group_by_query():
+            list(Recipe.objects.annotate(avg_rating_=Avg("reviews__rating")).order_by("-avg_rating_")[:3])
+
+        def leaderboard_query():
+            list(Recipe.objects.summaries().popular()[:3])
+
+        client = Client()
+        rows = [
+            ("GROUP BY over reviews", f"{measure(group_by_query):.2f}"),
+            ("popularity_score index", f"{measure(leaderboard_query):.2f}"),
+            ("homepage (leaderboard)", f"{measure(lambda: client.get(reverse('index'))):.2f}"),
+        ]
+        print_table(("popular recipes query", "ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Rows per second when seeding recipes with import_recipes against creating them
+one at a time through Recipe.save(), as RecipeCreate does.
+"""
+
+import json
+import shutil
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from benchmarks import print_table, setup, test_database
+
+NUM_OF_IMPORTED = 50_000
+NUM_OF_SAVED = 1000
+TITLES = ("pancakes", "tomato soup", "omelette", "banana bread", "chili")
+
+
+def recipe_row(i):
+    return {
+        "title": f"{TITLES[i % len(TITLES)]} {i // 100}",
+        "excerpt": "benchmark",
+        "ingredients": "2 eggs\n200 g flour\n1 pinch salt",
+        "preparation": "Mix everything and bake.",
+        "serving": "Serve warm.",
+    }
+
+
+def main():
+    setup()
+    from django.core.management import call_command
+
+    from recipes.models import Recipe
+
+    directory = Path(tempfile.mkdtemp())
+    try:
+        path = directory / "recipes.jsonl"
+        with open(path, "w") as file:
+            for i in range(NUM_OF_IMPORTED):
+                file.write(f"{json.dumps(recipe_row(i))}\n")
+
+        with test_database():
+            start = time.perf_counter()
+            for i in range(NUM_OF_SAVED):
+                recipe = Recipe(**recipe_row(i))
+                recipe.save()
+                recipe.update_structured_ingredients()
+            saved = NUM_OF_SAVED / (time.perf_counter() - start)
+            Recipe.objects.all().delete()
+
+            start = time.perf_counter()
+            call_command("import_recipes", str(path), stdout=StringIO())
+            imported = NUM_OF_IMPORTED / (time.perf_counter() - start)
+
+        print_table(
+            ("method", "rows", "rows/s", "1M rows (min)"),
+            [
+                ("Recipe.save() per row", NUM_OF_SAVED, f"{saved:.0f}", f"{1_000_000 / saved / 60:.0f}"),
+                ("import_recipes", NUM_OF_IMPORTED, f"{imported:.0f}", f"{1_000_000 / imported / 60:.0f}"),
+            ],
+        )
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Server-side rendering time of a 50-row RecipeList page with cold and warm
+recipe summary fragment caches.
+"""
+
+from benchmarks import measure, print_table, setup, test_database
+
+NUM_OF_RECIPES = 50
+
+
+def main():
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.cache import caches
+    from django.test import Client
+    from django.urls import reverse
+
+    from recipes.models import Recipe
+
+    with test_database():
+        user = get_user_model().objects.create_user(username="bench", email="bench@test.com", password="bench")
+        for i in range(NUM_OF_RECIPES):
+            Recipe.objects.create(
+                author=user,
+                title=f"benchmark recipe {i}",
+                excerpt="A short introduction.\n\nWith a second paragraph. " * 5,
+            )
+        client = Client()
+        url = reverse("recipe-list")
+        data = {"paginate_by": str(NUM_OF_RECIPES)}
+
+        def cold():
+            caches["fragments"].clear()
+            client.get(url, data)
+
+        client.get(url, data)
+        rows = [
+            ("cold", f"{measure(cold, repeat=20):.2f}"),
+            ("warm", f"{measure(lambda: client.get(url, data), repeat=20):.2f}"),
+        ]
+        print_table(("summary cache", "page ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
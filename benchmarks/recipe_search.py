@@ -0,0 +1,71 @@
+"""
+Recipe search latency through the full-text index against an icontains scan.
+
+The number of recipes defaults to 100k and can be raised with
+``python -m benchmarks.recipe_search 1000000``.
+"""
+
+import random
+import sys
+
+from benchmarks import measure, print_table, setup, test_database
+
+INGREDIENTS = (
+    "chickpea tomato onion garlic basil lentil rice flour egg butter sugar lemon thyme potato carrot "
+    "spinach feta yoghurt cumin paprika chicken salmon tofu noodle ginger coconut mango oat honey"
+).split()
+FILLER = [f"word{i}" for i in range(20_000)]
+QUERIES = ("chickpea", "tomato basil", "coconut mango rice", "salm")
+
+
+def words(k):
+    return random.sample(INGREDIENTS, 1) + random.sample(FILLER, k - 1)
+
+
+def main():
+    setup()
+    from django.db import connection
+    from django.db.models import Q
+
+    from recipes.models import Recipe
+    from recipes.search import get_search_backend
+
+    num_of_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(0)
+    with test_database():
+        for start in range(0, num_of_recipes, 10_000):
+            Recipe.objects.bulk_create(
+                Recipe(
+                    title=" ".join(words(3)),
+                    slug=f"recipe-{i}",
+                    excerpt=" ".join(random.sample(FILLER, 12)),
+                    ingredients="\n".join(words(8)),
+                    preparation=" ".join(random.sample(FILLER, 40)),
+                )
+                for i in range(start, min(start + 10_000, num_of_recipes))
+            )
+        get_search_backend(connection).rebuild()
+
+        rows = []
+        for query in QUERIES:
+
+            def scan():
+                queryset = Recipe.objects.all()
+                for term in query.split():
+                    queryset = queryset.filter(
+                        Q(title__icontains=term) | Q(excerpt__icontains=term) | Q(ingredients__icontains=term)
+                    )
+                list(queryset.order_by("-created_date", "-id")[:100])
+
+            rows.append(
+                (
+                    query,
+                    f"{measure(lambda: Recipe.objects.summaries().search(query, 100)):.2f}",
+                    f"{measure(scan, repeat=3):.2f}",
+                )
+            )
+        print_table((f"query ({num_of_recipes} recipes)", "index ms", "icontains ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Recipe creation latency as the number of recipes sharing a title grows.
+
+Compares Recipe.save() against the previous one-query-per-duplicate slug loop.
+"""
+
+from benchmarks import measure, print_table, setup, test_database
+
+DUPLICATE_COUNTS = (0, 10, 100, 1000, 5000)
+
+
+def legacy_allocate_slug(Recipe, slugify, title):
+    slug = slugify(title)
+    i = 1
+    while Recipe.objects.filter(slug=slug).exists():
+        slug = f"{slugify(title)}-{str(i)}"
+        i += 1
+    return slug
+
+
+def main():
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from django.utils.text import slugify
+
+    from recipes.models import Recipe
+
+    with test_database():
+        rows = []
+        created = 0
+        for duplicates in DUPLICATE_COUNTS:
+            Recipe.objects.bulk_create(
+                Recipe(title="pancakes", slug="pancakes" if i == 0 else f"pancakes-{i}")
+                for i in range(created, duplicates)
+            )
+            created = max(created, duplicates)
+            Recipe.objects.resync_slug_counter("pancakes")
+
+            def create():
+                Recipe.objects.create(title="pancakes").delete()
+
+            with CaptureQueriesContext(connection) as queries:
+                Recipe.objects.allocate_slug("pancakes")
+            allocation_queries = len(queries)
+            rows.append(
+                (
+                    duplicates,
+                    allocation_queries,
+                    f"{measure(create):.2f}",
+                    f"{measure(lambda: legacy_allocate_slug(Recipe, slugify, 'pancakes'), repeat=3):.2f}",
+                )
+            )
+        print_table(("duplicates", "queries", "create ms", "legacy allocation ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
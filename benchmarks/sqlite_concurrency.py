@@ -0,0 +1,114 @@
+"""
+Throughput of concurrent readers and reviewers on a SQLite file, with Django's
+stock backend (rollback journal, deferred transactions) against the tuned
+custom.db.backends.sqlite3 backend (WAL, busy_timeout, immediate transactions
+and a read-only alias for reads).
+
+Every mode runs in a fresh process configured through DB_ENGINE. Readers fetch
+recipe detail pages through the WSGI handler and reviewers post reviews in
+transactions, both for a fixed amount of time.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import print_table, setup, test_database
+
+NUM_OF_RECIPES = 20
+NUM_OF_READERS = 8
+NUM_OF_REVIEWERS = 4
+DURATION = 5.0
+
+MODES = (
+    ("django.db.backends.sqlite3", "rollback journal"),
+    ("custom.db.backends.sqlite3", "WAL, tuned PRAGMAs"),
+)
+
+
+def run_mode():
+    setup()
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import DatabaseError, connections, transaction
+    from django.test import RequestFactory
+
+    from recipes.models import Recipe, Review
+
+    settings.DATABASES["default"]["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+
+    with test_database():
+        Recipe.objects.bulk_create(
+            Recipe(title=f"benchmark recipe {i}", slug=f"benchmark-recipe-{i}") for i in range(NUM_OF_RECIPES)
+        )
+        recipes = list(Recipe.objects.using("default").only("pk", "slug"))
+        connections.close_all()
+
+        handler = WSGIHandler()
+        factory = RequestFactory()
+        deadline = time.perf_counter() + DURATION
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def count(name):
+            with lock:
+                counts[name] += 1
+
+        def reader():
+            i = 0
+            while time.perf_counter() < deadline:
+                environ = factory._base_environ(PATH_INFO=recipes[i % len(recipes)].get_absolute_url())
+                response = handler(environ, lambda status, headers: None)
+                response.close()
+                count("reads" if response.status_code == 200 else "errors")
+                i += 1
+
+        def reviewer():
+            i = 0
+            while time.perf_counter() < deadline:
+                try:
+                    with transaction.atomic():
+                        Review.objects.create(
+                            author=None, recipe_id=recipes[i % len(recipes)].pk, rating=i % 5 + 1, content="benchmark"
+                        )
+                    count("writes")
+                except DatabaseError:
+                    count("errors")
+                i += 1
+            connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(NUM_OF_READERS)]
+        threads += [threading.Thread(target=reviewer) for _ in range(NUM_OF_REVIEWERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    print(json.dumps(counts))
+
+
+def main():
+    rows = []
+    for engine, name in MODES:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sqlite_concurrency", "--run-mode"],
+            env={**os.environ, "DB_ENGINE": engine},
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            rows.append((name, "-", "-", result.stderr.strip().splitlines()[-1]))
+            continue
+        counts = json.loads(result.stdout.strip().splitlines()[-1])
+        rows.append((name, f"{counts['reads'] / DURATION:.0f}", f"{counts['writes'] / DURATION:.0f}", counts["errors"]))
+    print_table(("journal", "reads/s", "reviews/s", "errors"), rows)
+
+
+if __name__ == "__main__":
+    if "--run-mode" in sys.argv:
+        run_mode()
+    else:
+        main()
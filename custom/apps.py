@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CustomConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'custom'
+
+    def ready(self):
+        from django.conf import settings
+        from PIL import Image
+
+        # Pillow refuses to open images of more than twice this many pixels.
+        Image.MAX_IMAGE_PIXELS = settings.IMAGE_UPLOAD_MAX_PIXELS
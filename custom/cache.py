@@ -0,0 +1,159 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.module_loading import import_string
+
+MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend that keeps recently used entries in a per-process LRU tier in
+    front of a shared tier every worker reads from.
+
+    ``OPTIONS["SHARED_BACKEND"]`` is the dotted path of the shared backend,
+    which receives ``LOCATION`` and ``OPTIONS["SHARED_OPTIONS"]``. Local entries
+    live for at most ``OPTIONS["LOCAL_TIMEOUT"]`` seconds, which bounds how long
+    another process can serve a value this process deleted.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        key_params = {name: params[name] for name in ("KEY_PREFIX", "VERSION", "KEY_FUNCTION") if name in params}
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 30)
+        self.local = LocMemCache(
+            f"tiered:{location}:{params.get('KEY_PREFIX', '')}",
+            {**key_params, "TIMEOUT": self.local_timeout, "OPTIONS": {"MAX_ENTRIES": options.get("LOCAL_MAX_ENTRIES", 1000)}},
+        )
+        shared_backend = import_string(options.get("SHARED_BACKEND", "django.core.cache.backends.locmem.LocMemCache"))
+        self.shared = shared_backend(
+            location, {**key_params, "TIMEOUT": params.get("TIMEOUT", 300), "OPTIONS": options.get("SHARED_OPTIONS", {})}
+        )
+
+    def get_local_timeout(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return min(max(timeout - time.time(), 0), self.local_timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        if not self.shared.add(key, value, timeout, version=version):
+            return False
+        self.local.set(key, value, self.get_local_timeout(timeout), version=version)
+        return True
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, MISSING, version=version)
+        if value is MISSING:
+            value = self.shared.get(key, MISSING, version=version)
+            if value is MISSING:
+                return default
+            self.local.set(key, value, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self.get_local_timeout(timeout), version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.local.delete(key, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.delete(key, version=version)
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self.local.set_many(shared, version=version)
+            found.update(shared)
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.local.set_many(data, self.get_local_timeout(timeout), version=version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version=version) or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+
+def get_or_compute(cache, key, compute, timeout=DEFAULT_TIMEOUT, beta=1.0):
+    """
+    Returns the cached result of ``compute()`` and protects it from stampedes.
+
+    Entries are refreshed early with a probability that grows as they near
+    expiry, scaled by how long ``compute`` took (probabilistic early
+    expiration), and only the worker that wins the lock recomputes them while
+    the others keep serving the current value. On a cold miss the other workers
+    wait up to CACHE_LOCK_TIMEOUT seconds for the winner's result.
+    """
+    timeout = cache.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+    lock_key = f"{key}:lock"
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires_at = entry
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires_at:
+            return value
+        if not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+    try:
+        started = time.monotonic()
+        value = compute()
+        expires_at = math.inf if timeout is None else time.time() + timeout
+        cache.set(key, (value, time.monotonic() - started, expires_at), timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def namespace_generation(cache, namespace):
+    """
+    Returns the current generation of ``namespace``, which keys of its entries
+    include. A missing generation is seeded from the clock rather than a
+    constant, so an evicted generation never brings back entries keyed with an
+    earlier one.
+    """
+    return cache.get_or_set(f"{namespace}:generation", time.time_ns, None)
+
+
+def bump_namespace(cache, namespace):
+    """Makes every entry keyed with the current generation of ``namespace`` unreachable."""
+    try:
+        cache.incr(f"{namespace}:generation")
+    except ValueError:
+        cache.set(f"{namespace}:generation", time.time_ns(), None)
@@ -0,0 +1,98 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from custom.pagination import CursorPage
+
+
+def page_state(context):
+    """Returns what else a paginated page shows besides its rows: its position and the page links."""
+    page = context.get("page_obj")
+    if page is None:
+        return ()
+    if isinstance(page, CursorPage):
+        return (page.has_next(), page.has_previous())
+    return (page.number, page.paginator.num_pages)
+
+
+def field_value(obj, path):
+    """Follows a ``__`` separated path such as ``author__username``, stopping at a missing relation."""
+    for name in path.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def page_validators(objects, *fields, extra=()):
+    """
+    Returns ``(version, None)`` for a page of ``objects``: the primary keys and
+    ``fields`` of every row, which may follow relations like
+    ``author__username``, and ``extra`` values such as the page count. Pages of
+    rows send no Last-Modified, because deleting a row takes it off the page
+    without making any remaining row newer; the version covers deletions.
+    """
+    version = (tuple(extra), [(obj.pk, *(field_value(obj, field) for field in fields)) for obj in objects])
+    return version, None
+
+
+class ConditionalGetMixin:
+    """
+    View mixin that answers ``If-None-Match`` and ``If-Modified-Since`` with
+    304 Not Modified before the template is rendered.
+
+    Views implement ``get_validators(context)`` and return ``(version,
+    last_modified)`` built from the rows they already fetched, so a revalidation
+    costs the view's queries but no rendering. Anonymous pages may be stored by
+    shared caches; pages of signed-in users are private and their ETag also
+    covers the user and CSRF cookie, as those pages embed user-specific markup
+    and form tokens. Requests with pending messages are always rendered, so a
+    message is never swallowed by a 304.
+    """
+
+    def get_validators(self, context=None):
+        raise NotImplementedError("ConditionalGetMixin requires get_validators().")
+
+    def conditional_validators(self, context=None):
+        if not hasattr(self, "_conditional_validators"):
+            self._conditional_validators = None
+            if self.request.method in ("GET", "HEAD") and not len(get_messages(self.request)):
+                version, last_modified = self.get_validators(context)
+                if self.request.user.is_authenticated:
+                    version = (version, self.request.user.pk, self.request.COOKIES.get(settings.CSRF_COOKIE_NAME))
+                etag = quote_etag(md5(repr(version).encode(), usedforsecurity=False).hexdigest())
+                self._conditional_validators = (etag, int(last_modified.timestamp()) if last_modified else None)
+        return self._conditional_validators
+
+    def patch_conditional_headers(self, response):
+        etag, last_modified = self._conditional_validators
+        response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        if self.request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.HTTP_CACHE_MAX_AGE)
+        patch_vary_headers(response, ("Cookie",))
+        return response
+
+    def not_modified_response(self, context=None):
+        """Returns the 304 response when the client's copy is current, otherwise None."""
+        validators = self.conditional_validators(context)
+        if validators is None:
+            return None
+        response = get_conditional_response(self.request, etag=validators[0], last_modified=validators[1])
+        return None if response is None else self.patch_conditional_headers(response)
+
+    def render_to_response(self, context, **response_kwargs):
+        response = self.not_modified_response(context)
+        if response is not None:
+            return response
+        response = super().render_to_response(context, **response_kwargs)
+        if self._conditional_validators is None:
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return self.patch_conditional_headers(response)
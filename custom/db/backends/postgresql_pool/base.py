@@ -0,0 +1,98 @@
+"""
+PostgreSQL backend that borrows connections from a psycopg_pool
+ConnectionPool instead of opening one per request.
+
+Pool arguments (``min_size``, ``max_size``, ``timeout``, ...) are read from
+``OPTIONS["pool"]``. Closing the Django connection returns it to the pool, so
+CONN_MAX_AGE must be 0; CONN_HEALTH_CHECKS makes the pool check a connection
+before lending it.
+"""
+
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+from django.utils.asyncio import async_unsafe
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError as e:
+    raise ImproperlyConfigured(f"Error loading psycopg_pool module: {e}")
+
+if not base.is_psycopg3:
+    raise ImproperlyConfigured("Pooled connections require psycopg 3.")
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # A pooled connection to the test database would make DROP DATABASE fail.
+        self.connection.close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    pools = {}
+    pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_pool(self, conn_params):
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured("Pooled connections require CONN_MAX_AGE = 0.")
+        key = (self.alias, conn_params.get("dbname"))
+        with self.pools_lock:
+            if key not in self.pools:
+                check = ConnectionPool.check_connection if self.settings_dict["CONN_HEALTH_CHECKS"] else None
+                self.pools[key] = ConnectionPool(
+                    kwargs=conn_params,
+                    check=check,
+                    name=f"{self.alias}:{conn_params.get('dbname')}",
+                    open=True,
+                    **self.settings_dict["OPTIONS"].get("pool", {}),
+                )
+            return self.pools[key]
+
+    def close_pools(self):
+        with self.pools_lock:
+            for key in [key for key in self.pools if key[0] == self.alias]:
+                self.pools.pop(key).close()
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        # Creating and dropping the test database goes through a short-lived connection to "postgres".
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        try:
+            self.isolation_level = base.IsolationLevel(
+                base.IsolationLevel.READ_COMMITTED if isolation_level is None else isolation_level
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f"Invalid transaction isolation level {isolation_level} specified. "
+                f"Use one of the psycopg.IsolationLevel values."
+            )
+        pool = self.get_pool(conn_params)
+        connection = pool.getconn()
+        if isolation_level is not None:
+            connection.isolation_level = self.isolation_level
+        self.pool = pool
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            self.pool.putconn(self.connection)
+        self.pool = None
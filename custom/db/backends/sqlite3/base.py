@@ -0,0 +1,39 @@
+"""
+SQLite backend for serving the site from a single database file.
+
+``OPTIONS["pragmas"]`` are applied to every new connection (WAL journaling,
+busy timeout, cache and mmap sizes, ...), ``OPTIONS["transaction_mode"]``
+chooses how atomic blocks begin, and ``OPTIONS["read_only"]`` opens the file
+read-only for aliases that only serve reads.
+"""
+
+from pathlib import Path
+
+from django.db.backends.sqlite3 import base
+from django.utils.asyncio import async_unsafe
+
+BACKEND_OPTIONS = ("pragmas", "transaction_mode", "read_only")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        for option in BACKEND_OPTIONS:
+            conn_params.pop(option, None)
+        if self.settings_dict["OPTIONS"].get("read_only") and not self.is_in_memory_db():
+            conn_params["database"] = f"{Path(self.settings_dict['NAME']).resolve().as_uri()}?mode=ro"
+        return conn_params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict["OPTIONS"].get("pragmas", {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.settings_dict["OPTIONS"].get("read_only"):
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # IMMEDIATE takes the write lock up front, so a transaction that reads
+        # before writing waits on busy_timeout instead of failing to upgrade its lock.
+        self.cursor().execute(f"BEGIN {self.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED')}")
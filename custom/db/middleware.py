@@ -0,0 +1,36 @@
+from django.conf import settings
+
+from custom.db.routers import primary_pinned, primary_written
+
+PIN_COOKIE_NAME = "primary_pin"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    Reads from the primary database for the whole request when it may write
+    (unsafe methods) or when the session wrote less than DB_REPLICA_PIN_SECONDS
+    ago, and starts that window with a cookie whenever a request writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = request.method not in SAFE_METHODS or PIN_COOKIE_NAME in request.COOKIES
+        pinned_token, written_token = primary_pinned.set(pinned), primary_written.set(False)
+        try:
+            response = self.get_response(request)
+            if primary_written.get() and settings.DATABASE_REPLICAS:
+                response.set_cookie(
+                    PIN_COOKIE_NAME,
+                    "1",
+                    max_age=settings.DB_REPLICA_PIN_SECONDS,
+                    secure=settings.SESSION_COOKIE_SECURE,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            primary_pinned.reset(pinned_token)
+            primary_written.reset(written_token)
+        return response
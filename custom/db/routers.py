@@ -0,0 +1,38 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set once the current context must read from the primary, e.g. after writing to it.
+primary_pinned = ContextVar("primary_pinned", default=False)
+# Set whenever the current context writes to the primary.
+primary_written = ContextVar("primary_written", default=False)
+
+
+class ReplicaRouter:
+    """
+    Sends reads to one of DATABASE_REPLICAS and writes to the default database.
+
+    A write pins the current context to the primary, so the rest of it reads
+    its own writes instead of data a replica may not have caught up with;
+    ReadYourWritesMiddleware scopes the pin to a request and carries it over to
+    the session's next requests. Reads inside a transaction on the primary stay
+    on it as well.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and not primary_pinned.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        primary_pinned.set(True)
+        primary_written.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
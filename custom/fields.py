@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.forms import ImageField
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import gettext_lazy as _
+from PIL import Image
+
+
+class LimitedImageField(ImageField):
+    """
+    ImageField that enforces IMAGE_UPLOAD_MAX_SIZE, IMAGE_UPLOAD_MAX_DIMENSION and
+    IMAGE_UPLOAD_MAX_PIXELS. The dimensions are read from the image header before
+    Pillow verifies the whole file.
+    """
+
+    default_error_messages = {
+        "file_too_large": _("The image may not be larger than %(max_size)s."),
+        "dimensions_too_large": _("The image may be at most %(max)s pixels wide and high, it is %(width)s×%(height)s."),
+        "too_many_pixels": _("The image may have at most %(max)s megapixels."),
+    }
+
+    def to_python(self, data):
+        if data not in self.empty_values:
+            self.check_size(data)
+            if hasattr(data, "temporary_file_path") or hasattr(data, "read"):
+                self.check_dimensions(data)
+        return super().to_python(data)
+
+    def check_size(self, data):
+        if getattr(data, "oversized", False) or data.size > settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise ValidationError(
+                self.error_messages["file_too_large"],
+                code="file_too_large",
+                params={"max_size": filesizeformat(settings.IMAGE_UPLOAD_MAX_SIZE)},
+            )
+
+    def check_dimensions(self, data):
+        try:
+            with Image.open(data.temporary_file_path() if hasattr(data, "temporary_file_path") else data) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            raise ValidationError(
+                self.error_messages["too_many_pixels"],
+                code="too_many_pixels",
+                params={"max": settings.IMAGE_UPLOAD_MAX_PIXELS // 1_000_000},
+            )
+        except Exception:
+            # Left to ImageField, which reports the file as an invalid image.
+            return
+        finally:
+            if hasattr(data, "seek"):
+                data.seek(0)
+        if max(width, height) > settings.IMAGE_UPLOAD_MAX_DIMENSION:
+            raise ValidationError(
+                self.error_messages["dimensions_too_large"],
+                code="dimensions_too_large",
+                params={"max": settings.IMAGE_UPLOAD_MAX_DIMENSION, "width": width, "height": height},
+            )
+        if width * height > settings.IMAGE_UPLOAD_MAX_PIXELS:
+            raise ValidationError(
+                self.error_messages["too_many_pixels"],
+                code="too_many_pixels",
+                params={"max": settings.IMAGE_UPLOAD_MAX_PIXELS // 1_000_000},
+            )
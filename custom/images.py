@@ -0,0 +1,210 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from django.templatetags.static import static
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from jobs import queue
+from storage.url_cache import cached_url, invalidate_url
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_IMAGE = "images/placeholder.svg"
+
+VARIANTS_DIRECTORY = "variants"
+
+image_variants_updated = Signal()
+
+VARIANT_FORMATS = {
+    "avif": ("AVIF", "image/avif"),
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+# Formats without an alpha channel; transparent images are flattened onto this background for them.
+OPAQUE_VARIANT_FORMATS = ("jpeg",)
+OPAQUE_BACKGROUND = "white"
+
+
+def supported_variant_formats():
+    Image.init()
+    return [name for name, (pillow_format, mime_type) in VARIANT_FORMATS.items() if pillow_format in Image.SAVE]
+
+
+def variant_name(source_name, size, variant_format):
+    return posixpath.join(VARIANTS_DIRECTORY, posixpath.splitext(source_name)[0], f"{size}.{variant_format}")
+
+
+def variant_source_stem(name):
+    """Returns the source name, without its extension, of the variant stored as ``name``."""
+    return posixpath.dirname(name)[len(VARIANTS_DIRECTORY) + 1 :]
+
+
+def manifest_variant_names(manifest):
+    return [name for names in manifest.get("variants", {}).values() for name in names.values()]
+
+
+def has_transparency(image):
+    return image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+
+
+def render_variant(image, size, variant_format):
+    variant = ImageOps.contain(image, (size, size), Image.Resampling.LANCZOS)
+    if variant.mode == "RGBA" and variant_format in OPAQUE_VARIANT_FORMATS:
+        background = Image.new("RGB", variant.size, OPAQUE_BACKGROUND)
+        background.paste(variant, mask=variant.getchannel("A"))
+        variant = background
+    buffer = BytesIO()
+    variant.save(buffer, VARIANT_FORMATS[variant_format][0], quality=settings.IMAGE_VARIANT_QUALITY)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_image_variants(field_file):
+    """
+    Writes a thumbnail of ``field_file`` for every IMAGE_VARIANT_SIZES bounding box
+    in every supported format next to the original in its storage, and returns the
+    manifest describing them.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert("RGBA" if has_transparency(image) else "RGB")
+    variants = {}
+    for variant_format in supported_variant_formats():
+        variants[variant_format] = {}
+        for size in settings.IMAGE_VARIANT_SIZES:
+            name = variant_name(field_file.name, size, variant_format)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[variant_format][str(size)] = storage.save(name, render_variant(image, size, variant_format))
+            invalidate_url(storage, name)
+    return {"source": field_file.name, "variants": variants}
+
+
+def image_variants_outdated(field_file, manifest):
+    if not field_file.name or field_file.name == field_file.field.default:
+        return bool(manifest)
+    return manifest.get("source") != field_file.name
+
+
+def save_manifest(instance, field_name, manifest_field_name, manifest):
+    setattr(instance, manifest_field_name, manifest)
+    updates = {manifest_field_name: manifest}
+    # The rendered picture changes with the manifest, so the row counts as modified.
+    for field in type(instance)._meta.concrete_fields:
+        if getattr(field, "auto_now", False):
+            updates[field.attname] = field.pre_save(instance, add=False)
+    field_file = getattr(instance, field_name)
+    type(instance)._default_manager.filter(pk=instance.pk, **{field_name: field_file.name}).update(**updates)
+
+
+def reset_uploaded_image_variants(instance, field_name, manifest_field_name):
+    """
+    pre_save hook that drops the manifest of a newly uploaded file. Storages that
+    overwrite files can give the upload the same name as the file it replaces.
+    """
+    field_file = getattr(instance, field_name)
+    if field_file and not field_file._committed:
+        setattr(instance, manifest_field_name, {})
+
+
+def schedule_image_variants(instance, field_name, manifest_field_name):
+    """
+    Queues variant generation for an image field whose manifest was built for a
+    different file and marks the manifest as pending, so templates show a
+    placeholder instead of the full-size original until the worker is done.
+    """
+    field_file = getattr(instance, field_name)
+    if not image_variants_outdated(field_file, getattr(instance, manifest_field_name)):
+        return
+    invalidate_url(field_file.storage, field_file.name)
+    if not settings.IMAGE_VARIANTS_ENABLED:
+        return
+    if not field_file.name or field_file.name == field_file.field.default:
+        save_manifest(instance, field_name, manifest_field_name, {})
+        return
+    save_manifest(instance, field_name, manifest_field_name, {"source": field_file.name, "pending": True})
+    queue.enqueue(
+        "images.generate_variants",
+        model=instance._meta.label_lower,
+        pk=instance.pk,
+        field_name=field_name,
+        manifest_field_name=manifest_field_name,
+        source=field_file.name,
+    )
+
+
+def update_image_variants(instance, field_name, manifest_field_name):
+    """
+    Generates the variants of an image field whose manifest is outdated,
+    pending or failed. Unreadable images get an empty manifest, so templates
+    fall back to the original; storage errors are raised for the job queue to
+    retry.
+    """
+    field_file = getattr(instance, field_name)
+    manifest = getattr(instance, manifest_field_name)
+    if not (image_variants_outdated(field_file, manifest) or manifest.get("pending") or manifest.get("failed")):
+        return
+    manifest = {}
+    if field_file.name and field_file.name != field_file.field.default:
+        try:
+            manifest = generate_image_variants(field_file)
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            logger.exception("Could not generate variants of %s", field_file.name)
+    save_manifest(instance, field_name, manifest_field_name, manifest)
+    image_variants_updated.send(sender=type(instance), instance=instance)
+
+
+def mark_variants_failed(model, pk, field_name, manifest_field_name, source):
+    """
+    Replaces a pending manifest once variant generation has given up, so
+    templates show the original image; the generate_image_variants command
+    retries it.
+    """
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    if instance is not None and getattr(instance, field_name).name == source:
+        save_manifest(instance, field_name, manifest_field_name, {"source": source, "failed": True})
+
+
+@queue.register("images.generate_variants", on_failure=mark_variants_failed)
+def generate_variants_job(model, pk, field_name, manifest_field_name, source):
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    if instance is not None and getattr(instance, field_name).name == source:
+        update_image_variants(instance, field_name, manifest_field_name)
+
+
+def picture_sources(field_file, manifest, size):
+    """
+    Returns ``(src, srcset, sources)`` for a ``size`` pixel slot: the JPEG
+    thumbnail with its 1x/2x ``srcset``, and ``(mime_type, srcset)`` pairs for the
+    better formats, best first. Falls back to the original when the manifest was
+    not built for the current file or its variants failed, and to a placeholder
+    while it is pending.
+    """
+    current = bool(field_file.name) and manifest.get("source") == field_file.name
+    if current and manifest.get("pending"):
+        return static(PLACEHOLDER_IMAGE), "", []
+    storage = field_file.storage
+    original = cached_url(storage, field_file.name) or settings.MEDIA_URL + field_file.field.default
+    variants = manifest.get("variants", {}) if current else {}
+    if not variants:
+        return original, "", []
+    srcsets = {}
+    for variant_format, names in variants.items():
+        srcsets[variant_format] = ", ".join(
+            f"{cached_url(storage, names[str(width)])} {density}x"
+            for density, width in ((1, size), (2, size * 2))
+            if str(width) in names
+        )
+    jpeg = variants.get("jpeg", {})
+    src = cached_url(storage, jpeg[str(size)]) if str(size) in jpeg else original
+    sources = [
+        (VARIANT_FORMATS[variant_format][1], srcset)
+        for variant_format, srcset in srcsets.items()
+        if variant_format != "jpeg" and srcset
+    ]
+    return src, srcsets.get("jpeg", ""), sources
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from custom.images import update_image_variants
+
+IMAGE_VARIANT_FIELDS = (
+    ("recipes.Recipe", "image", "image_variants"),
+    ("accounts.CustomUser", "profile_image", "profile_image_variants"),
+)
+
+
+class Command(BaseCommand):
+    help = "Generates missing, outdated, pending or failed thumbnail variants of recipe and profile images in-process."
+
+    def handle(self, *args, **options):
+        for model_label, field_name, manifest_field_name in IMAGE_VARIANT_FIELDS:
+            model = apps.get_model(model_label)
+            for instance in model._default_manager.order_by("pk").iterator():
+                try:
+                    update_image_variants(instance, field_name, manifest_field_name)
+                except OSError as error:
+                    self.stderr.write(f"Could not update image variants of {instance!r}: {error}")
+            self.stdout.write(self.style.SUCCESS(f"Updated image variants of {model._meta.verbose_name_plural}."))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.exceptions import FieldError
+
+
+class DeferredFieldGuardMixin:
+    """
+    Model mixin that raises instead of lazily loading a deferred field when
+    RAISE_ON_DEFERRED_FIELD_ACCESS is enabled, so that templates reading a
+    column left out of an only()/defer() projection fail in tests rather than
+    running one query per row.
+    """
+
+    def refresh_from_db(self, using=None, fields=None):
+        if fields is not None and settings.RAISE_ON_DEFERRED_FIELD_ACCESS:
+            deferred = self.get_deferred_fields().intersection(fields)
+            if deferred:
+                raise FieldError(
+                    f"Accessed deferred field(s) {', '.join(sorted(deferred))} of {type(self).__name__} {self.pk}."
+                )
+        super().refresh_from_db(using=using, fields=fields)
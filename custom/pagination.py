@@ -0,0 +1,166 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import reduce
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+
+from custom.cache import bump_namespace, get_or_compute, namespace_generation
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over a queryset ordered descending by ``fields``.
+
+    A page is fetched with a range condition on the last row of the previous page,
+    so every page costs the same no matter how deep it is and no COUNT is run.
+    The last field must be unique so that the ordering is total.
+    """
+
+    def __init__(self, queryset, per_page, fields):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.fields = fields
+
+    def encode_cursor(self, direction, obj):
+        values = [str(getattr(obj, field)) for field in self.fields]
+        return urlsafe_b64encode(json.dumps([direction, values]).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            direction, values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if direction not in ("next", "previous") or len(values) != len(self.fields):
+                raise ValueError
+            opts = self.queryset.model._meta
+            return direction, [opts.get_field(field).to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise Http404(_("Invalid cursor."))
+
+    def keyset_filter(self, values, lookup):
+        conditions = []
+        for i, field in enumerate(self.fields):
+            equal = dict(zip(self.fields[:i], values))
+            conditions.append(Q(**equal, **{f"{field}__{lookup}": values[i]}))
+        return reduce(lambda left, right: left | right, conditions)
+
+    def page(self, cursor):
+        ordering = [f"-{field}" for field in self.fields]
+        if not cursor:
+            rows = list(self.queryset.order_by(*ordering)[: self.per_page + 1])
+            has_more, has_before = len(rows) > self.per_page, False
+        else:
+            direction, values = self.decode_cursor(cursor)
+            if direction == "next":
+                rows = list(self.queryset.filter(self.keyset_filter(values, "lt")).order_by(*ordering)[: self.per_page + 1])
+                has_more, has_before = len(rows) > self.per_page, True
+            else:
+                rows = list(self.queryset.filter(self.keyset_filter(values, "gt")).order_by(*self.fields)[: self.per_page + 1])
+                has_before, has_more = len(rows) > self.per_page, True
+                rows = rows[: self.per_page][::-1]
+        rows = rows[: self.per_page]
+        next_cursor = self.encode_cursor("next", rows[-1]) if rows and has_more else None
+        previous_cursor = self.encode_cursor("previous", rows[0]) if rows and has_before else None
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def count_namespace(model):
+    return f"count:{model._meta.label_lower}"
+
+
+def invalidate_cached_counts(model):
+    bump_namespace(caches["computed"], count_namespace(model))
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator that keeps the COUNT of its queryset in the "computed" cache under
+    ``count_key``, so only one worker recounts a busy list when the entry expires.
+    """
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return get_or_compute(caches["computed"], self.count_key, lambda: Paginator.count.func(self))
+
+
+class BoundedPaginationMixin:
+    """
+    ListView mixin that validates ``?paginate_by=`` against PAGINATE_BY_MAX.
+
+    Views that set ``cursor_fields`` additionally serve keyset pages when the
+    request carries a ``cursor`` parameter (an empty value is the first page).
+    Views that set ``cache_count`` take the row count of numbered pages from the
+    cache; saving or deleting a row of the model calls invalidate_cached_counts().
+    """
+
+    paginate_by = 5
+    cursor_fields = None
+    cache_count = False
+
+    def get_paginate_by(self, queryset):
+        try:
+            paginate_by = int(self.request.GET.get("paginate_by", self.paginate_by))
+        except (TypeError, ValueError):
+            return self.paginate_by
+        if paginate_by < 1:
+            return self.paginate_by
+        return min(paginate_by, settings.PAGINATE_BY_MAX)
+
+    def is_cursor_paginated(self):
+        return self.cursor_fields is not None and "cursor" in self.request.GET
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        if not self.cache_count:
+            return super().get_paginator(queryset, per_page, **kwargs)
+        namespace = count_namespace(queryset.model)
+        generation = namespace_generation(caches["computed"], namespace)
+        query = md5(str(queryset.query).encode(), usedforsecurity=False).hexdigest()
+        return CachedCountPaginator(queryset, per_page, f"{namespace}:{generation}:{query}", **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_cursor_paginated():
+            return super().paginate_queryset(queryset, page_size)
+        page = CursorPaginator(queryset, page_size, self.cursor_fields).page(self.request.GET["cursor"])
+        return (None, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["is_cursor_paginated"] = self.is_cursor_paginated()
+        return context
+
+    def get(self, request, *args, **kwargs):
+        request.GET = request.GET.copy()
+        request.GET["paginate_by"] = str(self.get_paginate_by(None))
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,10 @@
+from django import template
+from django.core.cache import caches
+
+register = template.Library()
+
+
+@register.simple_tag
+def cache_timeout(alias):
+    """Returns the configured timeout of the ``alias`` cache, for ``{% cache %}`` blocks stored in it."""
+    return caches[alias].default_timeout
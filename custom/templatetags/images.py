@@ -0,0 +1,19 @@
+from django import template
+
+from custom.images import picture_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag("images/picture.html")
+def picture(field_file, manifest, size, alt="", css_class="img-fluid", style=""):
+    src, srcset, sources = picture_sources(field_file, manifest, size)
+    return {
+        "src": src,
+        "srcset": srcset,
+        "sources": sources,
+        "size": size,
+        "alt": alt,
+        "css_class": css_class,
+        "style": style,
+    }
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connections
+from django.test.signals import setting_changed
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+# Alias of the read-only SQLite file the runner adds for tests that use it; they copy the primary into it themselves.
+SNAPSHOT_REPLICA = "replica_0"
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin for views that declare a ``query_budget`` attribute.
+
+    The budget is the number of queries an anonymous GET may run, independent of
+    the number of rows shown, so any N+1 pattern makes the test fail.
+    """
+
+    def assertWithinQueryBudget(self, path, data=None, budget=None, using="default"):
+        if budget is None:
+            budget = resolve(path).func.view_class.query_budget
+        with CaptureQueriesContext(connections[using]) as context:
+            response = self.client.get(path, data)
+        executed = len(context)
+        if executed > budget:
+            queries = "\n".join(f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, start=1))
+            self.fail(f"{path} executed {executed} queries, over its budget of {budget}:\n{queries}")
+        return response
+
+    def assertQueriesUseIndexes(self, path, data=None, using="default"):
+        """
+        Runs EXPLAIN QUERY PLAN on every ordered SELECT a GET issues and fails if
+        SQLite has to sort rows itself instead of reading them in index order.
+        """
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            self.skipTest("Query plans are only checked on SQLite.")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(path, data)
+        ordered = [query["sql"] for query in context.captured_queries if "ORDER BY" in query["sql"]]
+        self.assertTrue(ordered, f"{path} executed no ordered queries.")
+        for sql in ordered:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = "\n".join(row[-1] for row in cursor.fetchall())
+            if "USE TEMP B-TREE FOR ORDER BY" in plan:
+                self.fail(f"{path} sorts without an index:\n{sql}\n{plan}")
+        return response
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner that turns on RAISE_ON_DEFERRED_FIELD_ACCESS for the whole suite
+    and turns off image variant generation, which tests that need it enable
+    together with a temporary MEDIA_ROOT. Caches are kept in memory, and the
+    "computed" cache is disabled because its entries would outlive the rows each
+    test rolls back. On the custom SQLite backend, tests that ask for SNAPSHOT_REPLICA get it as a
+    separate read-only file when no such replica is configured.
+    """
+
+    replica_directory = None
+
+    test_settings = {
+        "RAISE_ON_DEFERRED_FIELD_ACCESS": True,
+        "IMAGE_VARIANTS_ENABLED": False,
+        "CACHES": {
+            "default": {"BACKEND": "custom.cache.TieredCache", "LOCATION": "default"},
+            "fragments": {"BACKEND": "custom.cache.TieredCache", "LOCATION": "fragments", "TIMEOUT": 3600},
+            "computed": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        },
+    }
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.saved_settings = {name: getattr(settings, name) for name in self.test_settings}
+        for name, value in self.test_settings.items():
+            setattr(settings, name, value)
+            setting_changed.send(sender=type(self), setting=name, value=value, enter=True)
+
+    def setup_databases(self, **kwargs):
+        old_config = super().setup_databases(**kwargs)
+        if (
+            SNAPSHOT_REPLICA in kwargs["aliases"]
+            and SNAPSHOT_REPLICA not in connections
+            and connections.settings["default"]["ENGINE"] == "custom.db.backends.sqlite3"
+        ):
+            self.replica_directory = tempfile.mkdtemp()
+            primary = connections.settings["default"]
+            # Mirroring default keeps the read-only file out of the flush after each TransactionTestCase.
+            connections.settings[SNAPSHOT_REPLICA] = {
+                **primary,
+                "NAME": f"{self.replica_directory}/replica.sqlite3",
+                "OPTIONS": {"pragmas": settings.SQLITE_PRAGMAS, "read_only": True},
+                "TEST": {**primary["TEST"], "MIRROR": "default"},
+            }
+        return old_config
+
+    def teardown_databases(self, old_config, **kwargs):
+        if self.replica_directory:
+            connections[SNAPSHOT_REPLICA].close()
+            del connections[SNAPSHOT_REPLICA]
+            del connections.settings[SNAPSHOT_REPLICA]
+            shutil.rmtree(self.replica_directory)
+        super().teardown_databases(old_config, **kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        for name, value in self.saved_settings.items():
+            setattr(settings, name, value)
+            setting_changed.send(sender=type(self), setting=name, value=value, enter=False)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Stands in for an upload that was cut off at IMAGE_UPLOAD_MAX_SIZE; it has no content."""
+
+    oversized = True
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    def open(self, mode=None):
+        raise ValueError("The upload was discarded because it is too large.")
+
+
+class UploadSizeLimitHandler(FileUploadHandler):
+    """
+    Upload handler placed in front of the default ones that stops passing a
+    file's chunks on once it exceeds IMAGE_UPLOAD_MAX_SIZE, so the rest of the
+    body is read and dropped instead of buffered. The file is then replaced by an
+    OversizedUploadedFile, which form fields report as too large.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.oversized = True
+        if self.oversized:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.oversized:
+            return None
+        return OversizedUploadedFile(
+            self.file_name, self.content_type, self.received, self.charset, self.content_type_extra
+        )
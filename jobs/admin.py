@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import Job
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_filter = ("status", "name")
+    list_display = ("name", "status", "attempts", "run_after", "created_date")
+    readonly_fields = ["created_date", "last_error"]
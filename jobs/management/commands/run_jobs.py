@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.queue import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs, polling the queue until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit once no job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = run_pending_jobs()
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Ran {processed} job(s)."))
+            if options["once"]:
+                return
+            time.sleep(settings.JOBS_POLL_INTERVAL)
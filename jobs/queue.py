@@ -0,0 +1,101 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def register(name, max_attempts=None, on_failure=None):
+    """
+    Registers the decorated function as the handler of jobs called ``name``.
+    ``on_failure`` is called with the job's payload once its last attempt failed.
+    """
+
+    def decorator(handler):
+        handlers[name] = (handler, max_attempts or settings.JOBS_MAX_ATTEMPTS, on_failure)
+        return handler
+
+    return decorator
+
+
+def enqueue(name, **payload):
+    """
+    Adds a job to the queue. The row is written in the caller's transaction, so a
+    rolled back request never leaves a job behind and workers only see committed jobs.
+    """
+    return Job.objects.create(name=name, payload=payload, max_attempts=handlers[name][1])
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX))
+
+
+def claim_jobs(limit):
+    """
+    Locks up to ``limit`` due jobs for this worker. Running jobs whose lock
+    expired belong to a worker that died and are claimed again.
+    """
+    now = timezone.now()
+    due = Q(status=Job.Status.PENDING, run_after__lte=now) | Q(status=Job.Status.RUNNING, locked_until__lt=now)
+    with transaction.atomic():
+        jobs = list(Job.objects.select_for_update(skip_locked=True).filter(due).order_by("run_after", "pk")[:limit])
+        for job in jobs:
+            job.status = Job.Status.RUNNING
+            job.attempts += 1
+            job.locked_until = now + timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+        Job.objects.bulk_update(jobs, ["status", "attempts", "locked_until"])
+    return jobs
+
+
+def run_failure_handler(job):
+    on_failure = handlers[job.name][2] if job.name in handlers else None
+    if on_failure is None:
+        return
+    try:
+        on_failure(**job.payload)
+    except Exception:
+        logger.exception("Failure handler of job %s failed", job)
+
+
+def run_job(job):
+    try:
+        handler = handlers[job.name][0]
+        handler(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            logger.exception("Job %s failed for the last time", job)
+            job.status = Job.Status.FAILED
+            run_failure_handler(job)
+        else:
+            logger.warning("Job %s failed, retrying", job, exc_info=True)
+            job.status = Job.Status.PENDING
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        job.locked_until = None
+        job.save(update_fields=["status", "run_after", "locked_until", "last_error"])
+        return False
+    job.delete()
+    return True
+
+
+def run_pending_jobs(limit=None):
+    """Runs due jobs until none are left, or ``limit`` have run. Returns how many ran."""
+    processed = 0
+    while limit is None or processed < limit:
+        batch_size = settings.JOBS_BATCH_SIZE if limit is None else min(settings.JOBS_BATCH_SIZE, limit - processed)
+        jobs = claim_jobs(batch_size)
+        if not jobs:
+            break
+        for job in jobs:
+            run_job(job)
+        processed += len(jobs)
+    return processed
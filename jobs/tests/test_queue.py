@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+
+calls = []
+failures = []
+
+
+@queue.register("tests.record", max_attempts=3)
+def record(value):
+    calls.append(value)
+
+
+@queue.register("tests.fail", max_attempts=3, on_failure=lambda **payload: failures.append(payload))
+def fail(**payload):
+    raise OSError("storage unavailable")
+
+
+@override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RETRY_BACKOFF_MAX=15, JOBS_LOCK_TIMEOUT=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        failures.clear()
+
+    def test_enqueued_job_runs_once_and_is_removed(self):
+        job = queue.enqueue("tests.record", value=1)
+        self.assertEqual(job.status, Job.Status.PENDING)
+        self.assertEqual(job.max_attempts, 3)
+        self.assertEqual(queue.run_pending_jobs(), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(queue.run_pending_jobs(), 0)
+
+    def test_jobs_run_in_order_up_to_limit(self):
+        for value in range(3):
+            queue.enqueue("tests.record", value=value)
+        self.assertEqual(queue.run_pending_jobs(limit=2), 2)
+        self.assertEqual(calls, [0, 1])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        job = queue.enqueue("tests.fail")
+        with self.assertLogs("jobs.queue", "WARNING"):
+            queue.run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("storage unavailable", job.last_error)
+        self.assertAlmostEqual(job.run_after, timezone.now() + timedelta(seconds=10), delta=timedelta(seconds=5))
+        self.assertEqual(queue.run_pending_jobs(), 0)
+
+    def test_retry_delay_doubles_up_to_maximum(self):
+        self.assertEqual(
+            [queue.retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)],
+            [10, 15, 15],
+        )
+
+    def test_job_fails_after_max_attempts(self):
+        job = queue.enqueue("tests.fail", value=1)
+        with self.assertLogs("jobs.queue", "WARNING"):
+            for attempt in range(3):
+                self.assertEqual(failures, [])
+                Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                queue.run_pending_jobs()
+        self.assertEqual(failures, [{"value": 1}])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 3)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(queue.run_pending_jobs(), 0)
+
+    def test_expired_lock_is_reclaimed(self):
+        job = queue.enqueue("tests.record", value=1)
+        self.assertEqual(queue.claim_jobs(10), [job])
+        self.assertEqual(queue.claim_jobs(10), [])
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(queue.run_pending_jobs(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_run_jobs_command_once(self):
+        queue.enqueue("tests.record", value=1)
+        out = StringIO()
+        with mock.patch("time.sleep") as sleep:
+            call_command("run_jobs", "--once", stdout=out)
+        sleep.assert_not_called()
+        self.assertEqual(calls, [1])
+        self.assertIn("Ran 1 job(s).", out.getvalue())
@@ -1,12 +1,23 @@
 from django.contrib import admin
 
-from .models import Recipe, Review
+from .models import Ingredient, Recipe, RecipeIngredient, Review
+
+class RecipeIngredientInline(admin.TabularInline):
+    model = RecipeIngredient
+    extra = 0
+    readonly_fields = ["ingredient", "name", "quantity", "unit", "position"]
+    can_delete = False
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_filter = ("title", "author", "created_date", "modified_date")
     list_display = ("title", "author", "created_date", "slug")
-    readonly_fields = ["created_date", "modified_date", "slug",]
+    readonly_fields = ["created_date", "modified_date", "slug", "rating_count", "avg_rating", "popularity_score"]
+    inlines = [RecipeIngredientInline]
+
+@admin.register(Ingredient)
+class IngredientAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
@@ -1,5 +1,6 @@
 from django.forms import ModelForm, Textarea, NumberInput
 
+from custom.fields import LimitedImageField
 from custom.widgets import widgets
 from recipes.models import Recipe, Review
 
@@ -9,6 +10,7 @@ class RecipeForm(ModelForm):
         model = Recipe
         fields = ("image", "title", "excerpt", "ingredients", "preparation", "serving")
         labels = {"image": ""}
+        field_classes = {"image": LimitedImageField}
         widgets = {
             "image": widgets.get("custom_clearable_image_input"),
             "excerpt": Textarea(),
@@ -0,0 +1,101 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import connections, router, transaction
+
+from recipes import search
+from recipes.ingredients import store_ingredients
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+IMPORT_FIELDS = ("title", "excerpt", "ingredients", "preparation", "serving")
+FILE_FORMATS = ("jsonl", "csv")
+
+
+class ImportedBatch:
+    def __init__(self, rows, recipes, errors):
+        self.rows = rows
+        self.recipes = recipes
+        self.errors = errors
+
+
+def read_rows(file, file_format):
+    """Yields the rows of an open JSON Lines or CSV file one at a time; undecodable lines are yielded as None."""
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def clean_row(row):
+    """Returns ``(fields, author username, None)`` for a valid row, otherwise ``(None, None, error)``."""
+    if not isinstance(row, dict):
+        return None, None, "not a JSON object"
+    fields = {}
+    for name in IMPORT_FIELDS:
+        value = row.get(name) or ""
+        if not isinstance(value, str):
+            return None, None, f"{name} is not a string"
+        max_length = Recipe._meta.get_field(name).max_length
+        if len(value) > max_length:
+            return None, None, f"{name} is longer than {max_length} characters"
+        fields[name] = value
+    if not fields["title"].strip():
+        return None, None, "title is empty"
+    author = row.get("author") or None
+    if author is not None and not isinstance(author, str):
+        return None, None, "author is not a string"
+    return fields, author, None
+
+
+def import_batch(rows, first_row_number, default_author):
+    errors = []
+    cleaned = []
+    for row_number, row in enumerate(rows, start=first_row_number):
+        fields, username, error = clean_row(row)
+        if error is None:
+            cleaned.append((row_number, fields, username))
+        else:
+            errors.append((row_number, error))
+    usernames = {username for row_number, fields, username in cleaned if username}
+    author_ids = dict(get_user_model().objects.filter(username__in=usernames).values_list("username", "pk"))
+    recipes = []
+    for row_number, fields, username in cleaned:
+        if username and username not in author_ids:
+            errors.append((row_number, f"unknown author {username!r}"))
+        else:
+            recipes.append(Recipe(**fields, author_id=author_ids[username] if username else default_author))
+    if recipes:
+        for recipe, slug in zip(recipes, Recipe.objects.allocate_slugs([recipe.title for recipe in recipes])):
+            recipe.slug = slug
+        Recipe.objects.bulk_create(recipes)
+        if not connections[router.db_for_write(Recipe)].features.can_return_rows_from_bulk_insert:
+            pks = dict(Recipe.objects.filter(slug__in=[recipe.slug for recipe in recipes]).values_list("slug", "pk"))
+            for recipe in recipes:
+                recipe.pk = pks[recipe.slug]
+        search.index_recipes(Recipe, recipes)
+        store_ingredients(recipes, Ingredient, RecipeIngredient)
+    return recipes, sorted(errors)
+
+
+def import_recipes(rows, batch_size, default_author=None, skip=0):
+    """
+    Imports recipes from an iterable of rows, ``batch_size`` rows per
+    transaction, after skipping the first ``skip`` rows. Slugs, search entries
+    and structured ingredients are written in bulk, in a fixed number of
+    queries per batch. Yields an ImportedBatch once each batch is committed.
+    """
+    rows = islice(rows, skip, None)
+    row_number = skip + 1
+    while batch := list(islice(rows, batch_size)):
+        with transaction.atomic(using=router.db_for_write(Recipe)):
+            recipes, errors = import_batch(batch, row_number, default_author)
+        row_number += len(batch)
+        yield ImportedBatch(len(batch), len(recipes), errors)
@@ -0,0 +1,166 @@
+import re
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+UNITS = {
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "mg": "mg",
+    "ml": "ml",
+    "millilitre": "ml",
+    "millilitres": "ml",
+    "milliliter": "ml",
+    "milliliters": "ml",
+    "l": "l",
+    "litre": "l",
+    "litres": "l",
+    "liter": "l",
+    "liters": "l",
+    "tsp": "tsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "tbsp": "tbsp",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "cup": "cup",
+    "cups": "cup",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "pinch": "pinch",
+    "pinches": "pinch",
+    "clove": "clove",
+    "cloves": "clove",
+    "can": "can",
+    "cans": "can",
+    "slice": "slice",
+    "slices": "slice",
+    "piece": "piece",
+    "pieces": "piece",
+    "bunch": "bunch",
+    "handful": "handful",
+}
+UNICODE_FRACTIONS = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅛": "1/8"}
+QUANTITY_RE = re.compile(r"^(\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)")
+BULLET_RE = re.compile(r"^[\s\-*•·–]+")
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+ES_PLURAL_ENDINGS = ("oes", "shes", "ches", "xes", "sses")
+QUANTITY_MAX_DIGITS = 10
+QUANTITY_DECIMAL_PLACES = 3
+
+
+class ParsedIngredient:
+    def __init__(self, name, normalized_name, quantity, unit):
+        self.name = name
+        self.normalized_name = normalized_name
+        self.quantity = quantity
+        self.unit = unit
+
+    def __repr__(self):
+        return f"ParsedIngredient({self.quantity} {self.unit} {self.name!r} -> {self.normalized_name!r})"
+
+
+def parse_quantity(text):
+    """Returns the quantity rounded to QUANTITY_DECIMAL_PLACES, or None if it cannot be stored in QUANTITY_MAX_DIGITS."""
+    text = text.replace(",", ".")
+    try:
+        if " " in text:
+            whole, fraction = text.split()
+            quantity = Decimal(whole) + Decimal(Fraction(fraction).numerator) / Decimal(Fraction(fraction).denominator)
+        elif "/" in text:
+            fraction = Fraction(text)
+            quantity = Decimal(fraction.numerator) / Decimal(fraction.denominator)
+        else:
+            quantity = Decimal(text)
+        quantity = quantity.quantize(Decimal(1).scaleb(-QUANTITY_DECIMAL_PLACES))
+    except (InvalidOperation, ValueError, ZeroDivisionError):
+        return None
+    if len(quantity.as_tuple().digits) > QUANTITY_MAX_DIGITS:
+        return None
+    return quantity
+
+
+def normalize_ingredient_name(name):
+    name = PARENTHESES_RE.sub(" ", name.lower())
+    name = re.sub(r"[^\w\s-]", " ", name)
+    words = name.split()
+    if not words:
+        return ""
+    last = words[-1]
+    if last.endswith(ES_PLURAL_ENDINGS):
+        last = last[:-2]
+    elif last.endswith("ies") and len(last) > 4:
+        last = last[:-3] + "y"
+    elif last.endswith("s") and not last.endswith(("ss", "us", "is")) and len(last) > 3:
+        last = last[:-1]
+    return " ".join(words[:-1] + [last])
+
+
+def parse_ingredient_line(line):
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        line = line.replace(symbol, f" {fraction}")
+    line = BULLET_RE.sub("", line).strip()
+    quantity = None
+    match = QUANTITY_RE.match(line)
+    if match:
+        quantity = parse_quantity(match.group(1))
+        line = line[match.end() :].strip()
+    unit = ""
+    words = line.split(maxsplit=1)
+    if len(words) == 2 and words[0].lower().rstrip(".") in UNITS:
+        unit = UNITS[words[0].lower().rstrip(".")]
+        line = words[1]
+    if line.lower().startswith("of "):
+        line = line[3:]
+    name = line.strip(" ,;.")
+    normalized_name = normalize_ingredient_name(name)
+    if not normalized_name:
+        return None
+    return ParsedIngredient(name[:200], normalized_name[:200], quantity, unit)
+
+
+def parse_ingredients(text):
+    """Parses free-text ingredients, one per line, into ParsedIngredient objects."""
+    lines = text.splitlines()
+    if len(lines) == 1:
+        lines = re.split(r"[,;]", lines[0])
+    return [ingredient for ingredient in map(parse_ingredient_line, lines) if ingredient is not None]
+
+
+def store_ingredients(recipes, ingredient_model, recipe_ingredient_model):
+    """
+    Replaces the structured ingredients of recipes with those parsed from their text.
+
+    Takes the model classes so that data migrations can pass historical models.
+    Runs a fixed number of queries for the whole batch of recipes.
+    """
+    parsed = {recipe.pk: parse_ingredients(recipe.ingredients) for recipe in recipes}
+    names = {ingredient.normalized_name for ingredients in parsed.values() for ingredient in ingredients}
+    ingredient_model.objects.bulk_create(
+        [ingredient_model(name=name) for name in names], ignore_conflicts=True, batch_size=500
+    )
+    ingredient_ids = dict(ingredient_model.objects.filter(name__in=names).values_list("name", "pk"))
+    recipe_ingredient_model.objects.filter(recipe_id__in=parsed.keys()).delete()
+    recipe_ingredient_model.objects.bulk_create(
+        [
+            recipe_ingredient_model(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[ingredient.normalized_name],
+                name=ingredient.name,
+                quantity=ingredient.quantity,
+                unit=ingredient.unit,
+                position=position,
+            )
+            for recipe_id, ingredients in parsed.items()
+            for position, ingredient in enumerate(ingredients)
+        ],
+        batch_size=500,
+    )
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from custom.pagination import invalidate_cached_counts
+from recipes.importing import FILE_FORMATS, import_recipes, read_rows
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Imports recipes from a JSON Lines or CSV file in batches, resuming from the last checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSON Lines (.jsonl) or CSV (.csv) file with one recipe per row.")
+        parser.add_argument("--format", choices=FILE_FORMATS, help="File format, guessed from the extension by default.")
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.RECIPE_IMPORT_BATCH_SIZE, help="Rows imported per transaction."
+        )
+        parser.add_argument("--author", help="Username of the author of rows without an author column.")
+        parser.add_argument("--checkpoint", help="Checkpoint file, <path>.checkpoint by default.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and import from the first row.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in FILE_FORMATS:
+            raise CommandError(f"Cannot guess the format of {path}; pass --format.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        default_author = None
+        if options["author"]:
+            try:
+                default_author = get_user_model().objects.values_list("pk", flat=True).get(username=options["author"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['author']!r} does not exist.")
+        checkpoint = Path(options["checkpoint"] or f"{path}.checkpoint")
+        skip = 0
+        if checkpoint.exists() and not options["restart"]:
+            skip = json.loads(checkpoint.read_text())["rows"]
+            self.stdout.write(f"Resuming after row {skip}.")
+
+        rows = imported = skipped = 0
+        started = time.monotonic()
+        try:
+            with open(path, newline="", encoding="utf-8") as file:
+                for batch in import_recipes(read_rows(file, file_format), options["batch_size"], default_author, skip):
+                    rows += batch.rows
+                    imported += batch.recipes
+                    skipped += len(batch.errors)
+                    self.write_checkpoint(checkpoint, skip + rows)
+                    for row_number, error in batch.errors:
+                        self.stderr.write(f"Row {row_number}: {error}")
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{skip + rows} rows, {rows / (time.monotonic() - started):.0f} rows/s")
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        finally:
+            if imported:
+                invalidate_cached_counts(Recipe)
+        checkpoint.unlink(missing_ok=True)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {imported} recipe(s) from {rows} row(s), skipped {skipped}, "
+                f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)."
+            )
+        )
+
+    def write_checkpoint(self, checkpoint, rows):
+        temporary = checkpoint.with_name(f"{checkpoint.name}.tmp")
+        temporary.write_text(json.dumps({"rows": rows}))
+        os.replace(temporary, checkpoint)
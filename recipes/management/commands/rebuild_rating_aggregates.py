@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates the stored rating sum, count, average and popularity score of every recipe from its reviews. "
+        "Run it after changing the POPULAR_RECIPES_* settings."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Recipe.objects.rebuild_rating_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates of {updated} recipes."))
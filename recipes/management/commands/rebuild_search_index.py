@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from recipes.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of all recipes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="Database to rebuild the index in.")
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        with transaction.atomic(using=connection.alias):
+            get_search_backend(connection).rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the {connection.vendor} search index."))
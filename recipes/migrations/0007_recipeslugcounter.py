@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSlugCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base', models.SlugField(unique=True)),
+                ('last_suffix', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
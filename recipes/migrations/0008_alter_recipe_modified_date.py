@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_recipeslugcounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='modified_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.3 on 2026-10-18 00:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast
+
+
+def fill_popularity_score(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    prior_weight = settings.POPULAR_RECIPES_PRIOR_WEIGHT
+    Recipe.objects.filter(rating_count__gte=settings.POPULAR_RECIPES_MIN_REVIEWS).update(
+        popularity_score=ExpressionWrapper(
+            (Cast(F("rating_sum"), FloatField()) + prior_weight * settings.POPULAR_RECIPES_PRIOR_MEAN)
+            / (Cast(F("rating_count"), FloatField()) + prior_weight),
+            output_field=FloatField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_alter_recipe_modified_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity_score',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('popularity_score__isnull', False)), fields=['-popularity_score', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.RunPython(fill_popularity_score, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_recipe_fts "
+            "USING fts5(title, excerpt, ingredients, preparation, tokenize='porter unicode61')"
+        )
+        schema_editor.execute("DELETE FROM recipes_recipe_fts")
+        schema_editor.execute(
+            "INSERT INTO recipes_recipe_fts(rowid, title, excerpt, ingredients, preparation) "
+            "SELECT id, title, excerpt, ingredients, preparation FROM recipes_recipe"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE recipes_recipe ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS recipe_search_vector_idx ON recipes_recipe USING GIN (search_vector)"
+        )
+        schema_editor.execute(
+            "UPDATE recipes_recipe SET search_vector = "
+            "setweight(to_tsvector(%s, coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector(%s, coalesce(excerpt, '')), 'B') || "
+            "setweight(to_tsvector(%s, coalesce(ingredients, '')), 'C') || "
+            "setweight(to_tsvector(%s, coalesce(preparation, '')), 'D')",
+            [settings.SEARCH_CONFIG] * 4,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS recipe_search_vector_idx")
+        schema_editor.execute("ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_popularity_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,217 @@
+# Generated by Django 4.2.3 on 2026-10-18 00:42
+
+import re
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# A frozen copy of recipes.ingredients, so later changes to the parser cannot alter this migration.
+
+UNITS = {
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "mg": "mg",
+    "ml": "ml",
+    "millilitre": "ml",
+    "millilitres": "ml",
+    "milliliter": "ml",
+    "milliliters": "ml",
+    "l": "l",
+    "litre": "l",
+    "litres": "l",
+    "liter": "l",
+    "liters": "l",
+    "tsp": "tsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "tbsp": "tbsp",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "cup": "cup",
+    "cups": "cup",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "pinch": "pinch",
+    "pinches": "pinch",
+    "clove": "clove",
+    "cloves": "clove",
+    "can": "can",
+    "cans": "can",
+    "slice": "slice",
+    "slices": "slice",
+    "piece": "piece",
+    "pieces": "piece",
+    "bunch": "bunch",
+    "handful": "handful",
+}
+UNICODE_FRACTIONS = {"½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4", "⅛": "1/8"}
+QUANTITY_RE = re.compile(r"^(\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)")
+BULLET_RE = re.compile(r"^[\s\-*•·–]+")
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+ES_PLURAL_ENDINGS = ("oes", "shes", "ches", "xes", "sses")
+QUANTITY_MAX_DIGITS = 10
+QUANTITY_DECIMAL_PLACES = 3
+
+
+class ParsedIngredient:
+    def __init__(self, name, normalized_name, quantity, unit):
+        self.name = name
+        self.normalized_name = normalized_name
+        self.quantity = quantity
+        self.unit = unit
+
+
+def parse_quantity(text):
+    text = text.replace(",", ".")
+    try:
+        if " " in text:
+            whole, fraction = text.split()
+            quantity = Decimal(whole) + Decimal(Fraction(fraction).numerator) / Decimal(Fraction(fraction).denominator)
+        elif "/" in text:
+            fraction = Fraction(text)
+            quantity = Decimal(fraction.numerator) / Decimal(fraction.denominator)
+        else:
+            quantity = Decimal(text)
+        quantity = quantity.quantize(Decimal(1).scaleb(-QUANTITY_DECIMAL_PLACES))
+    except (InvalidOperation, ValueError, ZeroDivisionError):
+        return None
+    if len(quantity.as_tuple().digits) > QUANTITY_MAX_DIGITS:
+        return None
+    return quantity
+
+
+def normalize_ingredient_name(name):
+    name = PARENTHESES_RE.sub(" ", name.lower())
+    name = re.sub(r"[^\w\s-]", " ", name)
+    words = name.split()
+    if not words:
+        return ""
+    last = words[-1]
+    if last.endswith(ES_PLURAL_ENDINGS):
+        last = last[:-2]
+    elif last.endswith("ies") and len(last) > 4:
+        last = last[:-3] + "y"
+    elif last.endswith("s") and not last.endswith(("ss", "us", "is")) and len(last) > 3:
+        last = last[:-1]
+    return " ".join(words[:-1] + [last])
+
+
+def parse_ingredient_line(line):
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        line = line.replace(symbol, f" {fraction}")
+    line = BULLET_RE.sub("", line).strip()
+    quantity = None
+    match = QUANTITY_RE.match(line)
+    if match:
+        quantity = parse_quantity(match.group(1))
+        line = line[match.end() :].strip()
+    unit = ""
+    words = line.split(maxsplit=1)
+    if len(words) == 2 and words[0].lower().rstrip(".") in UNITS:
+        unit = UNITS[words[0].lower().rstrip(".")]
+        line = words[1]
+    if line.lower().startswith("of "):
+        line = line[3:]
+    name = line.strip(" ,;.")
+    normalized_name = normalize_ingredient_name(name)
+    if not normalized_name:
+        return None
+    return ParsedIngredient(name[:200], normalized_name[:200], quantity, unit)
+
+
+def parse_ingredients(text):
+    lines = text.splitlines()
+    if len(lines) == 1:
+        lines = re.split(r"[,;]", lines[0])
+    return [ingredient for ingredient in map(parse_ingredient_line, lines) if ingredient is not None]
+
+
+def store_ingredients(recipes, Ingredient, RecipeIngredient):
+    parsed = {recipe.pk: parse_ingredients(recipe.ingredients) for recipe in recipes}
+    names = {ingredient.normalized_name for ingredients in parsed.values() for ingredient in ingredients}
+    Ingredient.objects.bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True, batch_size=500)
+    ingredient_ids = dict(Ingredient.objects.filter(name__in=names).values_list("name", "pk"))
+    RecipeIngredient.objects.filter(recipe_id__in=parsed.keys()).delete()
+    RecipeIngredient.objects.bulk_create(
+        [
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_ids[ingredient.normalized_name],
+                name=ingredient.name,
+                quantity=ingredient.quantity,
+                unit=ingredient.unit,
+                position=position,
+            )
+            for recipe_id, ingredients in parsed.items()
+            for position, ingredient in enumerate(ingredients)
+        ],
+        batch_size=500,
+    )
+
+
+def parse_recipe_ingredients(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    RecipeIngredient = apps.get_model("recipes", "RecipeIngredient")
+    recipes = Recipe.objects.only("pk", "ingredients").order_by("pk")
+    last_pk = 0
+    while batch := list(recipes.filter(pk__gt=last_pk)[:500]):
+        store_ingredients(batch, Ingredient, RecipeIngredient)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('quantity', models.DecimalField(blank=True, decimal_places=3, max_digits=10, null=True)),
+                ('unit', models.CharField(blank=True, max_length=20)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='recipe_ingredients', to='recipes.ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='recipes.recipe')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_set',
+            field=models.ManyToManyField(related_name='recipes', through='recipes.RecipeIngredient', to='recipes.ingredient'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient', 'recipe'], name='recipe_ingredient_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['recipe', 'position'], name='recipe_ingredient_order_idx'),
+        ),
+        migrations.RunPython(parse_recipe_ingredients, migrations.RunPython.noop),
+    ]
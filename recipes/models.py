@@ -1,19 +1,238 @@
+import re
+from functools import reduce
+from operator import or_
 from typing import Any, Iterable, Optional
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.core.cache.utils import make_template_fragment_key
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Length, NullIf
+from django.db.models.lookups import GreaterThanOrEqual
 
-class Recipe(models.Model):
+from custom.models import DeferredFieldGuardMixin
+from recipes import search
+from storage.url_cache import cached_url
+from recipes.ingredients import (
+    QUANTITY_DECIMAL_PLACES,
+    QUANTITY_MAX_DIGITS,
+    normalize_ingredient_name,
+    store_ingredients,
+)
+
+SLUG_ALLOCATION_ATTEMPTS = 5
+SLUG_SUFFIX_RE = re.compile(r"[1-9][0-9]*")
+SLUG_LOOKUP_CHUNK_SIZE = 200
+RECIPE_SUMMARY_FIELDS = (
+    "slug",
+    "title",
+    "created_date",
+    "modified_date",
+    "excerpt",
+    "image",
+    "image_variants",
+    "rating_sum",
+    "rating_count",
+    "avg_rating",
+    "popularity_score",
+    "author__username",
+)
+RECIPE_SUMMARY_FRAGMENTS = ("recipe_summary_header", "recipe_summary_body")
+
+
+def popularity_score(rating_sum, rating_count):
+    """
+    Bayesian average of a recipe's ratings, pulled towards POPULAR_RECIPES_PRIOR_MEAN
+    with the weight of POPULAR_RECIPES_PRIOR_WEIGHT reviews. Recipes with fewer than
+    POPULAR_RECIPES_MIN_REVIEWS reviews get no score.
+    """
+    prior_weight = settings.POPULAR_RECIPES_PRIOR_WEIGHT
+    return Case(
+        When(
+            GreaterThanOrEqual(rating_count, settings.POPULAR_RECIPES_MIN_REVIEWS),
+            then=ExpressionWrapper(
+                (Cast(rating_sum, FloatField()) + prior_weight * settings.POPULAR_RECIPES_PRIOR_MEAN)
+                / (Cast(rating_count, FloatField()) + prior_weight),
+                output_field=FloatField(),
+            ),
+        ),
+        default=None,
+        output_field=FloatField(),
+    )
+
+
+class RecipeQuerySet(models.QuerySet):
+    def summaries(self):
+        return self.select_related("author").only(*RECIPE_SUMMARY_FIELDS)
+
+    def with_last_review_date(self):
+        last_review = Review.objects.filter(recipe=OuterRef("pk")).order_by("-modified_date").values("modified_date")
+        return self.annotate(last_review_date=Subquery(last_review[:1]))
+
+    def with_reviewer_versions(self):
+        """
+        Annotates the latest change to any reviewer's account and the number of
+        reviews that still have an author, so renamed or deleted reviewers
+        change what a recipe page validates against.
+        """
+        reviews = Review.objects.filter(recipe=OuterRef("pk"), author__isnull=False).order_by().values("recipe")
+        last_change = reviews.annotate(last_change=Max("author__modified_date")).values("last_change")
+        count = reviews.annotate(count=Count("pk")).values("count")
+        return self.annotate(
+            last_reviewer_change=Subquery(last_change),
+            reviewer_count=Coalesce(Subquery(count), Value(0)),
+        )
+
+    def allocate_slug(self, title):
+        base = slugify(title)
+        if RecipeSlugCounter.objects.filter(base=base).update(last_suffix=F("last_suffix") + 1):
+            return f"{base}-{RecipeSlugCounter.objects.values_list('last_suffix', flat=True).get(base=base)}"
+        last_suffix = self.get_last_slug_suffix(base)
+        try:
+            with transaction.atomic():
+                RecipeSlugCounter.objects.create(base=base, last_suffix=0 if last_suffix is None else last_suffix + 1)
+        except IntegrityError:
+            return self.allocate_slug(title)
+        if last_suffix is None:
+            return base
+        return f"{base}-{last_suffix + 1}"
+
+    def allocate_slugs(self, titles):
+        """
+        Allocates slugs for ``titles`` like allocate_slug() does one at a time,
+        in a fixed number of queries for the whole list. Must run in a
+        transaction, which keeps the counters of the slugs' bases locked.
+        """
+        bases = [slugify(title) for title in titles]
+        counters = {
+            counter.base: counter for counter in RecipeSlugCounter.objects.select_for_update().filter(base__in=set(bases))
+        }
+        last_suffixes = self.get_last_slug_suffixes(set(bases) - counters.keys())
+        new_counters = {}
+        slugs = []
+        for base in bases:
+            counter = counters.get(base) or new_counters.get(base)
+            if counter is not None:
+                counter.last_suffix += 1
+                slugs.append(f"{base}-{counter.last_suffix}")
+            elif last_suffixes.get(base) is None:
+                new_counters[base] = RecipeSlugCounter(base=base, last_suffix=0)
+                slugs.append(base)
+            else:
+                new_counters[base] = RecipeSlugCounter(base=base, last_suffix=last_suffixes[base] + 1)
+                slugs.append(f"{base}-{last_suffixes[base] + 1}")
+        RecipeSlugCounter.objects.bulk_update(counters.values(), ["last_suffix"], batch_size=500)
+        RecipeSlugCounter.objects.bulk_create(new_counters.values(), batch_size=500)
+        return slugs
+
+    def resync_slug_counter(self, base):
+        last_suffix = self.get_last_slug_suffix(base)
+        RecipeSlugCounter.objects.filter(base=base).update(last_suffix=0 if last_suffix is None else last_suffix)
+
+    def get_last_slug_suffix(self, base):
+        last_slug = (
+            self.filter(Q(slug=base) | Q(slug__startswith=f"{base}-", slug__regex=rf"^{re.escape(base)}-[1-9][0-9]*$"))
+            .order_by(Length("slug").desc(), F("slug").desc())
+            .values_list("slug", flat=True)
+            .first()
+        )
+        if last_slug is None:
+            return None
+        if last_slug == base:
+            return 0
+        return int(last_slug.rsplit("-", 1)[1])
+
+    def get_last_slug_suffixes(self, bases):
+        """
+        Returns get_last_slug_suffix() of every base that is taken. Bases are
+        looked up in chunks, as SQLite limits how many OR terms a query may have.
+        """
+        bases = sorted(bases)
+        last_suffixes = {}
+        for start in range(0, len(bases), SLUG_LOOKUP_CHUNK_SIZE):
+            chunk = set(bases[start : start + SLUG_LOOKUP_CHUNK_SIZE])
+            last_suffixes.update(dict.fromkeys(self.filter(slug__in=chunk).values_list("slug", flat=True), 0))
+            prefixed = reduce(or_, (Q(slug__startswith=f"{base}-") for base in chunk))
+            for slug in self.filter(prefixed).values_list("slug", flat=True).iterator():
+                base, _, suffix = slug.rpartition("-")
+                if base in chunk and SLUG_SUFFIX_RE.fullmatch(suffix):
+                    last_suffixes[base] = max(last_suffixes.get(base, 0), int(suffix))
+        return last_suffixes
+
+    def rebuild_rating_aggregates(self):
+        reviews = Review.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+        return self.update(
+            rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0),
+            rating_count=Coalesce(Subquery(reviews.annotate(total=Count("pk")).values("total")), 0),
+            avg_rating=Subquery(reviews.annotate(average=Avg("rating")).values("average")),
+            popularity_score=popularity_score(
+                Coalesce(Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0),
+                Coalesce(Subquery(reviews.annotate(total=Count("pk")).values("total")), 0),
+            ),
+        )
+
+    def search(self, query, limit):
+        ids = search.search_recipe_ids(self.model, query, limit)
+        recipes = self.in_bulk(ids)
+        return [recipes[pk] for pk in ids if pk in recipes]
+
+    def popular(self):
+        return self.filter(popularity_score__isnull=False).order_by("-popularity_score", "-id")
+
+    def with_all_ingredients(self, names):
+        """Recipes that use every one of the given ingredients."""
+        names = {normalize_ingredient_name(name) for name in names} - {""}
+        matching = (
+            RecipeIngredient.objects.filter(ingredient__name__in=names)
+            .order_by()
+            .values("recipe")
+            .annotate(matched=Count("ingredient", distinct=True))
+            .filter(matched=len(names))
+            .values("recipe")
+        )
+        return self.filter(pk__in=matching)
+
+    def cookable_with(self, names):
+        """Recipes whose every ingredient is among the given ones."""
+        names = {normalize_ingredient_name(name) for name in names} - {""}
+        missing = RecipeIngredient.objects.exclude(ingredient__name__in=names).order_by().values("recipe")
+        used = RecipeIngredient.objects.filter(ingredient__name__in=names).order_by().values("recipe")
+        return self.filter(pk__in=used).exclude(pk__in=missing)
+
+
+class RecipeSlugCounter(models.Model):
+    base = models.SlugField(unique=True)
+    last_suffix = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.base} [{self.last_suffix}]"
+
+
+class Recipe(DeferredFieldGuardMixin, models.Model):
     author = models.ForeignKey(get_user_model(), null=True, on_delete=models.SET_NULL, related_name="recipes")
     slug = models.SlugField(default="", blank=True, null=False, unique=True)
     title = models.CharField(max_length=100)
     created_date = models.DateField(auto_now_add=True)
-    modified_date = models.DateField(auto_now=True)
+    modified_date = models.DateTimeField(auto_now=True)
     excerpt = models.CharField(max_length=1000)
     ingredients = models.CharField(max_length=10000)
     preparation = models.CharField(max_length=10000)
@@ -25,6 +244,26 @@ class Recipe(models.Model):
         blank=True,
         default="images/default.jpg",
     )
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(null=True, blank=True, editable=False)
+    popularity_score = models.FloatField(null=True, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    ingredient_set = models.ManyToManyField("Ingredient", through="RecipeIngredient", related_name="recipes")
+
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_date", "-id"], name="recipe_created_idx"),
+            models.Index(fields=["author", "created_date", "id"], name="recipe_author_created_idx"),
+            models.Index(
+                fields=["-popularity_score", "-id"],
+                name="recipe_popularity_idx",
+                condition=Q(popularity_score__isnull=False),
+            ),
+            models.Index(fields=["image"], name="recipe_image_idx", opclasses=["varchar_pattern_ops"]),
+        ]
 
     def get_absolute_url(self):
         return reverse("recipe-detail", args=[self.slug])
@@ -35,32 +274,116 @@ class Recipe(models.Model):
         else:
             return f'"{self.title}", --- [{self.created_date.strftime("%b %d, %Y")}]'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "ingredients" in instance.__dict__:
+            instance._loaded_ingredients = instance.ingredients
+        return instance
+
+    def ingredients_changed(self, update_fields):
+        """
+        Tells whether a save writes ingredients that differ from the ones the
+        row was loaded with. Deferred ingredients are never loaded for this.
+        """
+        if update_fields is not None and "ingredients" not in update_fields:
+            return False
+        if "ingredients" not in self.__dict__:
+            return False
+        return self._state.adding or self.ingredients != getattr(self, "_loaded_ingredients", None)
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            slug = slugify(self.title)
-            i = 1
-            while Recipe.objects.filter(slug=slug).exists():
-                slug = f"{slugify(self.title)}-{str(i)}"
-                i += 1
-            self.slug = slug
-        super(Recipe, self).save(*args, **kwargs)
+        sync_ingredients = self.ingredients_changed(kwargs.get("update_fields"))
+        with transaction.atomic():
+            if self.slug:
+                super(Recipe, self).save(*args, **kwargs)
+            else:
+                self.save_with_new_slug(*args, **kwargs)
+            if sync_ingredients:
+                self.update_structured_ingredients()
+        self._loaded_ingredients = self.ingredients if "ingredients" in self.__dict__ else None
+        search.index_recipe(self)
+
+    def save_with_new_slug(self, *args, **kwargs):
+        for attempt in range(SLUG_ALLOCATION_ATTEMPTS):
+            self.slug = Recipe.objects.allocate_slug(self.title)
+            try:
+                with transaction.atomic():
+                    super(Recipe, self).save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt + 1 == SLUG_ALLOCATION_ATTEMPTS or not Recipe.objects.filter(slug=self.slug).exists():
+                    self.slug = ""
+                    raise
+                Recipe.objects.resync_slug_counter(slugify(self.title))
 
     def recipe_image_url_or_default(self):
-        try:
-            return self.image.url
-        except:
-            return settings.MEDIA_URL + "images/default.jpg"
+        return cached_url(self.image.storage, self.image.name) or settings.MEDIA_URL + "images/default.jpg"
         
+    def get_summary_cache_keys(self):
+        """
+        Returns the keys recipe_summary.html caches its fragments under. Every
+        change to the recipe, its ratings or its image variants moves
+        modified_date, and the author's username is part of the key, so stale
+        fragments are never read again and simply expire.
+        """
+        username = self.author.username if self.author_id else ""
+        vary_on = [self.pk, self.modified_date, self.rating_count, self.rating_sum, username]
+        return [make_template_fragment_key(fragment_name, vary_on) for fragment_name in RECIPE_SUMMARY_FRAGMENTS]
+
     def get_avg_rating(self):
-        avg_rating = self.reviews.aggregate(Avg("rating"))["rating__avg"]
-        if avg_rating is None:
+        if self.avg_rating is None:
             return "-"
         else: 
-            return avg_rating
+            return self.avg_rating
+
+    @classmethod
+    def update_rating_aggregates(cls, recipe_id, rating_delta, count_delta):
+        rating_sum = F("rating_sum") + rating_delta
+        rating_count = F("rating_count") + count_delta
+        cls.objects.filter(pk=recipe_id).update(
+            modified_date=timezone.now(),
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            avg_rating=ExpressionWrapper(
+                Cast(rating_sum, FloatField()) / NullIf(rating_count, Value(0)), output_field=FloatField()
+            ),
+            popularity_score=popularity_score(rating_sum, rating_count),
+        )
         
     def get_user_review(self, user):
         return Review.objects.filter(author=user, recipe=self).first()
-    
+
+    def update_structured_ingredients(self):
+        store_ingredients([self], Ingredient, RecipeIngredient)
+
+
+class Ingredient(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="recipe_ingredients")
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.PROTECT, related_name="recipe_ingredients")
+    name = models.CharField(max_length=200)
+    quantity = models.DecimalField(
+        max_digits=QUANTITY_MAX_DIGITS, decimal_places=QUANTITY_DECIMAL_PLACES, null=True, blank=True
+    )
+    unit = models.CharField(max_length=20, blank=True)
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["position"]
+        indexes = [
+            models.Index(fields=["ingredient", "recipe"], name="recipe_ingredient_lookup_idx"),
+            models.Index(fields=["recipe", "position"], name="recipe_ingredient_order_idx"),
+        ]
+
+    def __str__(self):
+        return " ".join(str(part) for part in (self.quantity, self.unit, self.name) if part)
 
 
 class Review(models.Model):
@@ -69,10 +392,37 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     content = models.CharField(max_length=2000)
     created_date = models.DateField(auto_now_add=True)
-    modified_date = models.DateField(auto_now=True)
+    modified_date = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('author', 'recipe',)
+        indexes = [
+            models.Index(fields=["recipe", "-created_date", "-id"], name="review_recipe_created_idx"),
+            models.Index(fields=["recipe", "-modified_date"], name="review_recipe_modified_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Review.objects.select_for_update().filter(pk=self.pk).values("recipe_id", "rating").first()
+            super(Review, self).save(*args, **kwargs)
+            if previous is None:
+                Recipe.update_rating_aggregates(self.recipe_id, self.rating, 1)
+            elif previous["recipe_id"] != self.recipe_id:
+                Recipe.update_rating_aggregates(previous["recipe_id"], -previous["rating"], -1)
+                Recipe.update_rating_aggregates(self.recipe_id, self.rating, 1)
+            elif previous["rating"] != self.rating:
+                Recipe.update_rating_aggregates(self.recipe_id, self.rating - previous["rating"], 0)
+            else:
+                return
+        self.refresh_recipe_rating()
+
+    def refresh_recipe_rating(self):
+        if Review.recipe.is_cached(self):
+            self.recipe.refresh_from_db(
+                fields=["modified_date", "rating_sum", "rating_count", "avg_rating", "popularity_score"]
+            )
 
     def __str__(self):
         if self.author:
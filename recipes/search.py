@@ -0,0 +1,209 @@
+import re
+
+from django.conf import settings
+from django.db import connections, router
+
+SEARCH_FIELDS = ("title", "excerpt", "ingredients", "preparation")
+SQLITE_TABLE = "recipes_recipe_fts"
+POSTGRES_INDEX = "recipe_search_vector_idx"
+POSTGRES_WEIGHTS = ("A", "B", "C", "D")
+
+
+def search_terms(query):
+    """
+    Splits a query into lowercase words. Every backend matches recipes that
+    contain all of them, the last one as a prefix, since it may still be typed.
+    """
+    return re.findall(r"\w+", query.lower())
+
+
+class SQLiteSearchBackend:
+    """FTS5 virtual table keyed by the recipe id and ranked with bm25."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+                f"USING fts5({', '.join(SEARCH_FIELDS)}, tokenize='porter unicode61')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE}(rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM recipes_recipe"
+            )
+
+    def index_recipe(self, recipe):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [recipe.pk])
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE}(rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+                [recipe.pk, *(getattr(recipe, field) for field in SEARCH_FIELDS)],
+            )
+
+    def index_recipes(self, recipes):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [[recipe.pk] for recipe in recipes])
+            cursor.executemany(
+                f"INSERT INTO {SQLITE_TABLE}(rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+                [[recipe.pk, *(getattr(recipe, field) for field in SEARCH_FIELDS)] for recipe in recipes],
+            )
+
+    def remove_recipe(self, pk):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", [pk])
+
+    def search(self, query, limit):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        phrases = [f'"{term}"' for term in terms]
+        phrases[-1] += "*"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s "
+                f"ORDER BY bm25({SQLITE_TABLE}, 10.0, 4.0, 2.0, 1.0) LIMIT %s",
+                [" ".join(phrases), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """Weighted tsvector column on recipes_recipe with a GIN index, ranked with ts_rank."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def vector_sql(self):
+        return " || ".join(
+            f"setweight(to_tsvector(%s, coalesce({field}, '')), '{weight}')"
+            for field, weight in zip(SEARCH_FIELDS, POSTGRES_WEIGHTS)
+        )
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE recipes_recipe ADD COLUMN IF NOT EXISTS search_vector tsvector")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON recipes_recipe USING GIN (search_vector)")
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+            cursor.execute("ALTER TABLE recipes_recipe DROP COLUMN IF EXISTS search_vector")
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE recipes_recipe SET search_vector = {self.vector_sql()}",
+                [settings.SEARCH_CONFIG] * len(SEARCH_FIELDS),
+            )
+
+    def index_recipe(self, recipe):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE recipes_recipe SET search_vector = {self.vector_sql()} WHERE id = %s",
+                [settings.SEARCH_CONFIG] * len(SEARCH_FIELDS) + [recipe.pk],
+            )
+
+    def index_recipes(self, recipes):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE recipes_recipe SET search_vector = {self.vector_sql()} WHERE id = ANY(%s)",
+                [settings.SEARCH_CONFIG] * len(SEARCH_FIELDS) + [[recipe.pk for recipe in recipes]],
+            )
+
+    def remove_recipe(self, pk):
+        pass
+
+    def search(self, query, limit):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        terms[-1] += ":*"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM recipes_recipe, to_tsquery(%s, %s) query "
+                "WHERE search_vector @@ query ORDER BY ts_rank(search_vector, query) DESC, id DESC LIMIT %s",
+                [settings.SEARCH_CONFIG, " & ".join(terms), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class FallbackSearchBackend:
+    """Unindexed icontains search for backends without full-text support."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        pass
+
+    def drop(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def index_recipe(self, recipe):
+        pass
+
+    def index_recipes(self, recipes):
+        pass
+
+    def remove_recipe(self, pk):
+        pass
+
+    def search(self, query, limit):
+        from django.db.models import Q
+
+        from recipes.models import Recipe
+
+        terms = search_terms(query)
+        if not terms:
+            return []
+        queryset = Recipe.objects.using(self.connection.alias)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term)
+                | Q(excerpt__icontains=term)
+                | Q(ingredients__icontains=term)
+                | Q(preparation__icontains=term)
+            )
+        return list(queryset.order_by("-created_date", "-id").values_list("pk", flat=True)[:limit])
+
+
+SEARCH_BACKENDS = {
+    "sqlite": SQLiteSearchBackend,
+    "postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend(connection):
+    return SEARCH_BACKENDS.get(connection.vendor, FallbackSearchBackend)(connection)
+
+
+def index_recipe(recipe):
+    connection = connections[router.db_for_write(type(recipe), instance=recipe)]
+    get_search_backend(connection).index_recipe(recipe)
+
+
+def index_recipes(model, recipes):
+    connection = connections[router.db_for_write(model)]
+    get_search_backend(connection).index_recipes(recipes)
+
+
+def remove_recipe(recipe):
+    connection = connections[router.db_for_write(type(recipe), instance=recipe)]
+    get_search_backend(connection).remove_recipe(recipe.pk)
+
+
+def search_recipe_ids(model, query, limit):
+    return get_search_backend(connections[router.db_for_read(model)]).search(query, limit)
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from custom.images import reset_uploaded_image_variants, schedule_image_variants
+from custom.pagination import invalidate_cached_counts
+from recipes import search
+from recipes.models import Recipe, Review
+from storage.references import track_media_references
+
+track_media_references(Recipe, "image")
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_counts(sender, instance, **kwargs):
+    invalidate_cached_counts(Recipe)
+
+
+@receiver(pre_save, sender=Recipe)
+def reset_recipe_image_variants(sender, instance, **kwargs):
+    reset_uploaded_image_variants(instance, "image", "image_variants")
+
+
+@receiver(post_save, sender=Recipe)
+def schedule_recipe_image_variants(sender, instance, **kwargs):
+    schedule_image_variants(instance, "image", "image_variants")
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_search_index(sender, instance, **kwargs):
+    search.remove_recipe(instance)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_rating(sender, instance, **kwargs):
+    Recipe.update_rating_aggregates(instance.recipe_id, -instance.rating, -1)
@@ -0,0 +1,148 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from custom.cache import TieredCache, bump_namespace, get_or_compute, namespace_generation
+from recipes.models import Recipe
+
+TIERED_CACHES = {
+    "default": {"BACKEND": "custom.cache.TieredCache", "LOCATION": "test-default"},
+    "fragments": {"BACKEND": "custom.cache.TieredCache", "LOCATION": "test-fragments"},
+    "computed": {"BACKEND": "custom.cache.TieredCache", "LOCATION": "test-computed", "TIMEOUT": 60},
+}
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache("tiered-tests", {"OPTIONS": {"LOCAL_TIMEOUT": 30}})
+        self.addCleanup(self.cache.clear)
+
+    def test_values_written_to_both_tiers(self):
+        self.cache.set("a", 1)
+        self.cache.set_many({"b": 2, "c": 3})
+        self.assertEqual(self.cache.local.get_many(["a", "b", "c"]), {"a": 1, "b": 2, "c": 3})
+        self.assertEqual(self.cache.shared.get_many(["a", "b", "c"]), {"a": 1, "b": 2, "c": 3})
+
+    def test_shared_values_copied_to_local_tier(self):
+        self.cache.set_many({"a": 1, "b": 2})
+        self.cache.local.clear()
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.local.get("a"), 1)
+        self.assertEqual(self.cache.get_many(["a", "b", "missing"]), {"a": 1, "b": 2})
+        self.assertEqual(self.cache.local.get("b"), 2)
+
+    def test_delete_and_incr_clear_local_tier(self):
+        self.cache.set("a", 1)
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("n", 1)
+        self.assertEqual(self.cache.incr("n"), 2)
+        self.assertEqual(self.cache.get("n"), 2)
+
+    def test_add_respects_shared_tier(self):
+        self.assertTrue(self.cache.add("a", 1))
+        self.cache.local.clear()
+        self.assertFalse(self.cache.add("a", 2))
+        self.assertEqual(self.cache.get("a"), 1)
+
+    def test_local_timeout_bounded_by_entry_timeout(self):
+        self.assertEqual(self.cache.get_local_timeout(None), 30)
+        self.assertEqual(self.cache.get_local_timeout(3600), 30)
+        self.assertLessEqual(self.cache.get_local_timeout(5), 5)
+        self.assertEqual(self.cache.get_local_timeout(0), 0)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache("get-or-compute-tests", {"TIMEOUT": 60})
+        self.addCleanup(self.cache.clear)
+        self.compute = mock.Mock(side_effect=[1, 2])
+
+    def test_result_computed_once(self):
+        self.assertEqual(get_or_compute(self.cache, "key", self.compute), 1)
+        self.assertEqual(get_or_compute(self.cache, "key", self.compute), 1)
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertIsNone(self.cache.get("key:lock"))
+
+    def test_entry_refreshed_early_by_lock_winner(self):
+        # The entry took ten seconds to compute and has a minute left, so only a high draw refreshes it.
+        self.cache.set("key", (0, 10.0, time.time() + 60))
+        with mock.patch("custom.cache.random.random", return_value=0.0):
+            self.assertEqual(get_or_compute(self.cache, "key", self.compute), 0)
+        with mock.patch("custom.cache.random.random", return_value=0.999999):
+            self.cache.add("key:lock", True)
+            self.assertEqual(get_or_compute(self.cache, "key", self.compute), 0)
+            self.cache.delete("key:lock")
+            self.assertEqual(get_or_compute(self.cache, "key", self.compute), 1)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_cold_miss_waits_for_lock_winner(self):
+        self.cache.add("key:lock", True)
+
+        def winner_finishes(interval):
+            self.cache.set("key", ("computed elsewhere", 0.0, float("inf")))
+
+        with mock.patch("custom.cache.time.sleep", side_effect=winner_finishes) as sleep:
+            self.assertEqual(get_or_compute(self.cache, "key", self.compute), "computed elsewhere")
+        sleep.assert_called_once()
+        self.compute.assert_not_called()
+
+
+class NamespaceTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache("namespace-tests", {})
+        self.addCleanup(self.cache.clear)
+
+    def test_bump_makes_generation_unreachable(self):
+        generation = namespace_generation(self.cache, "counts")
+        self.assertEqual(namespace_generation(self.cache, "counts"), generation)
+        bump_namespace(self.cache, "counts")
+        self.assertEqual(namespace_generation(self.cache, "counts"), generation + 1)
+
+    def test_evicted_generation_not_reused(self):
+        generation = namespace_generation(self.cache, "counts")
+        self.cache.delete("counts:generation")
+        self.assertNotEqual(namespace_generation(self.cache, "counts"), generation)
+        self.cache.delete("counts:generation")
+        bump_namespace(self.cache, "counts")
+        self.assertNotIn(namespace_generation(self.cache, "counts"), (generation, generation + 1))
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class CachedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        for i in range(6):
+            Recipe.objects.create(author=cls.user, title=f"recipe {i}", ingredients="a", preparation="b", serving="c")
+
+    def setUp(self):
+        for alias in TIERED_CACHES:
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+
+    def get_recipe_list(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("recipe-list"))
+        return response, len(context)
+
+    def test_count_cached_until_recipes_change(self):
+        response, cold_queries = self.get_recipe_list()
+        self.assertEqual(response.context_data["paginator"].num_pages, 2)
+        response, warm_queries = self.get_recipe_list()
+        self.assertEqual(warm_queries, cold_queries - 1)
+        self.assertEqual(response.context_data["paginator"].num_pages, 2)
+        for i in range(6, 10):
+            Recipe.objects.create(author=self.user, title=f"recipe {i}", ingredients="a", preparation="b", serving="c")
+        response, queries = self.get_recipe_list()
+        self.assertEqual(queries, cold_queries)
+        self.assertEqual(response.context_data["paginator"].num_pages, 2)
+        Recipe.objects.create(author=self.user, title="recipe 10", ingredients="a", preparation="b", serving="c")
+        response, queries = self.get_recipe_list()
+        self.assertEqual(response.context_data["paginator"].num_pages, 3)
@@ -0,0 +1,148 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Recipe, RecipeSlugCounter, Review
+
+
+class RebuildRatingAggregatesTests(TestCase):
+    def test_rebuild_rating_aggregates(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        user2 = get_user_model().objects.create_user(username="test2", email="test2@test.com", password="1234")
+        recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
+        recipe2 = Recipe.objects.create(author=user, title="test recipe2", excerpt="test")
+        Review.objects.create(author=user, recipe=recipe, rating=1, content="test")
+        Review.objects.create(author=user2, recipe=recipe, rating=4, content="test")
+        Recipe.objects.update(rating_sum=100, rating_count=100, avg_rating=1.0)
+        out = StringIO()
+        call_command("rebuild_rating_aggregates", stdout=out)
+        self.assertIn("Rebuilt rating aggregates of 2 recipes.", out.getvalue())
+        recipe.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (5, 2, 2.5))
+        self.assertEqual((recipe2.rating_sum, recipe2.rating_count, recipe2.avg_rating), (0, 0, None))
+
+
+class ImportRecipesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_jsonl(self, rows):
+        path = self.directory / "recipes.jsonl"
+        path.write_text("".join(f"{json.dumps(row)}\n" if isinstance(row, dict) else f"{row}\n" for row in rows))
+        return path
+
+    def import_recipes(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_recipes", str(path), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_jsonl(self):
+        Recipe.objects.create(author=self.user, title="Pancakes", excerpt="test")
+        path = self.write_jsonl(
+            [
+                {"title": "Pancakes", "ingredients": "2 eggs\n200 g flour", "author": "test"},
+                {"title": "Pancakes", "excerpt": "fluffy"},
+                {"title": "Tomato soup", "ingredients": "4 tomatoes", "preparation": "Simmer the tomatoes."},
+            ]
+        )
+        out, err = self.import_recipes(path, "--batch-size", "2")
+        self.assertIn("Imported 3 recipe(s) from 3 row(s), skipped 0", out)
+        self.assertEqual(err, "")
+        self.assertEqual(
+            list(Recipe.objects.order_by("id").values_list("slug", "author__username")),
+            [("pancakes", "test"), ("pancakes-1", "test"), ("pancakes-2", None), ("tomato-soup", None)],
+        )
+        self.assertEqual(RecipeSlugCounter.objects.get(base="pancakes").last_suffix, 2)
+        self.assertEqual(Recipe.objects.create(title="Pancakes").slug, "pancakes-3")
+        soup = Recipe.objects.get(slug="tomato-soup")
+        self.assertEqual([str(ingredient) for ingredient in soup.recipe_ingredients.all()], ["4.000 tomatoes"])
+        self.assertEqual([recipe.pk for recipe in Recipe.objects.search("simmer", 10)], [soup.pk])
+        self.assertFalse(Path(f"{path}.checkpoint").exists())
+
+    def test_import_csv_with_default_author(self):
+        path = self.directory / "recipes.csv"
+        path.write_text("title,excerpt,ingredients\nOmelette,quick,\"3 eggs, 1 pinch salt\"\n")
+        out, err = self.import_recipes(path, "--author", "test")
+        self.assertIn("Imported 1 recipe(s)", out)
+        recipe = Recipe.objects.get(slug="omelette")
+        self.assertEqual((recipe.author, recipe.excerpt), (self.user, "quick"))
+        self.assertEqual(recipe.recipe_ingredients.count(), 2)
+
+    def test_invalid_rows_skipped(self):
+        path = self.write_jsonl(
+            [
+                "not json",
+                {"title": ""},
+                {"title": "x" * 101},
+                {"title": "Soup", "author": "nobody"},
+                {"title": "Soup", "author": ["test"]},
+                {"title": "Soup", "author": {"username": "test"}},
+                {"title": "Soup"},
+            ]
+        )
+        out, err = self.import_recipes(path)
+        self.assertIn("Imported 1 recipe(s) from 7 row(s), skipped 6", out)
+        self.assertEqual(
+            err.splitlines(),
+            [
+                "Row 1: not a JSON object",
+                "Row 2: title is empty",
+                "Row 3: title is longer than 100 characters",
+                "Row 4: unknown author 'nobody'",
+                "Row 5: author is not a string",
+                "Row 6: author is not a string",
+            ],
+        )
+
+    def test_batch_runs_fixed_number_of_queries(self):
+        def count_queries(rows):
+            path = self.write_jsonl(rows)
+            with CaptureQueriesContext(connection) as context:
+                self.import_recipes(path, "--restart")
+            return len(context)
+
+        small = count_queries([{"title": f"Small {i}", "ingredients": "1 egg"} for i in range(2)])
+        large = count_queries([{"title": f"Large {i}", "ingredients": "1 egg"} for i in range(50)])
+        self.assertEqual(small, large)
+
+    def test_import_many_distinct_titles_in_one_batch(self):
+        Recipe.objects.create(title="Dish 7")
+        path = self.write_jsonl([{"title": f"Dish {i}"} for i in range(1200)])
+        out, err = self.import_recipes(path, "--batch-size", "1200")
+        self.assertIn("Imported 1200 recipe(s)", out)
+        self.assertEqual(Recipe.objects.count(), 1201)
+        self.assertTrue(Recipe.objects.filter(slug="dish-7-1").exists())
+        self.assertTrue(Recipe.objects.filter(slug="dish-1199").exists())
+
+    def test_resume_from_checkpoint(self):
+        path = self.write_jsonl([{"title": f"Recipe {i}"} for i in range(5)])
+        Path(f"{path}.checkpoint").write_text(json.dumps({"rows": 3}))
+        out, err = self.import_recipes(path, "--batch-size", "2")
+        self.assertIn("Resuming after row 3.", out)
+        self.assertEqual(list(Recipe.objects.order_by("id").values_list("slug", flat=True)), ["recipe-3", "recipe-4"])
+
+    def test_checkpoint_written_after_each_batch(self):
+        path = self.write_jsonl([{"title": f"Recipe {i}"} for i in range(5)])
+        with mock.patch("recipes.importing.search.index_recipes", side_effect=[None, None, RuntimeError]):
+            with self.assertRaises(RuntimeError):
+                self.import_recipes(path, "--batch-size", "2")
+        self.assertEqual(json.loads(Path(f"{path}.checkpoint").read_text()), {"rows": 4})
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.import_recipes(self.directory / "recipes.txt")
@@ -0,0 +1,156 @@
+import sqlite3
+import unittest
+
+from django.db import connection, connections, transaction
+from django.db.utils import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from custom.db.middleware import PIN_COOKIE_NAME, ReadYourWritesMiddleware
+from custom.db.routers import ReplicaRouter, primary_pinned, primary_written
+from custom.testing import SNAPSHOT_REPLICA
+from recipes.models import Recipe
+
+
+class SQLiteBackendTests(TestCase):
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Only the SQLite backend applies PRAGMAs.")
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        pragmas = connection.settings_dict["OPTIONS"].get("pragmas", {})
+        if "busy_timeout" not in pragmas:
+            self.skipTest("The default database has no PRAGMAs configured.")
+        self.assertEqual(self.pragma("busy_timeout"), pragmas["busy_timeout"])
+        self.assertEqual(self.pragma("cache_size"), pragmas["cache_size"])
+        self.assertEqual(self.pragma("temp_store"), 2)
+
+    def test_read_only_connection_rejects_writes(self):
+        wrapper = type(connections["default"])({**connection.settings_dict, "OPTIONS": {"read_only": True}})
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA query_only")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            with self.assertRaises(OperationalError):
+                cursor.execute("DELETE FROM recipes_recipe")
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    router = ReplicaRouter()
+
+    def setUp(self):
+        self.addCleanup(primary_pinned.reset, primary_pinned.set(False))
+        self.addCleanup(primary_written.reset, primary_written.set(False))
+
+    @override_settings(DATABASE_REPLICAS=["replica_0", "replica_1"])
+    def test_reads_use_replicas_until_a_write(self):
+        self.assertIn(self.router.db_for_read(Recipe), ["replica_0", "replica_1"])
+        self.assertEqual(self.router.db_for_write(Recipe), "default")
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+        self.assertTrue(primary_written.get())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_use_default_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Recipe), "default")
+
+    def test_migrations_only_run_on_default(self):
+        self.assertTrue(self.router.allow_migrate("default", "recipes"))
+        self.assertFalse(self.router.allow_migrate("replica_0", "recipes"))
+
+
+class ReplicaRouterTransactionTests(TestCase):
+    @override_settings(DATABASE_REPLICAS=["replica_0"])
+    def test_reads_stay_on_default_inside_transactions(self):
+        self.addCleanup(primary_pinned.reset, primary_pinned.set(False))
+        with transaction.atomic():
+            self.assertEqual(ReplicaRouter().db_for_read(Recipe), "default")
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], DB_REPLICA_PIN_SECONDS=5)
+class ReadYourWritesMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(primary_pinned.reset, primary_pinned.set(False))
+
+    def get_response(self, request, write=False):
+        def view(request):
+            self.read_alias = ReplicaRouter().db_for_read(Recipe)
+            if write:
+                ReplicaRouter().db_for_write(Recipe)
+            return HttpResponse()
+
+        return ReadYourWritesMiddleware(view)(request)
+
+    def test_safe_request_reads_replica(self):
+        response = self.get_response(self.factory.get("/"))
+        self.assertEqual(self.read_alias, "replica_0")
+        self.assertNotIn(PIN_COOKIE_NAME, response.cookies)
+
+    def test_write_pins_session_to_primary(self):
+        response = self.get_response(self.factory.get("/"), write=True)
+        self.assertEqual(response.cookies[PIN_COOKIE_NAME]["max-age"], 5)
+        self.assertFalse(primary_pinned.get())
+        request = self.factory.get("/")
+        request.COOKIES[PIN_COOKIE_NAME] = "1"
+        self.get_response(request)
+        self.assertEqual(self.read_alias, "default")
+
+    def test_unsafe_request_reads_primary(self):
+        self.get_response(self.factory.post("/"))
+        self.assertEqual(self.read_alias, "default")
+
+
+@override_settings(DATABASE_REPLICAS=[SNAPSHOT_REPLICA], DB_REPLICA_PIN_SECONDS=5)
+class SQLiteReplicaTests(TransactionTestCase):
+    """
+    Runs requests against a real replica: a read-only SQLite file holding a
+    snapshot of the primary, which never catches up with later writes.
+    """
+
+    databases = {"default", SNAPSHOT_REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        if SNAPSHOT_REPLICA not in connections:
+            raise unittest.SkipTest("The test runner only adds a snapshot replica on the custom SQLite backend.")
+        super().setUpClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(primary_pinned.reset, primary_pinned.set(False))
+        connections["default"].ensure_connection()
+        connections[SNAPSHOT_REPLICA].close()
+        replica = sqlite3.connect(connections[SNAPSHOT_REPLICA].settings_dict["NAME"])
+        with replica:
+            connections["default"].connection.backup(replica)
+        replica.close()
+
+    def request(self, method, cookies=None):
+        def view(request):
+            if request.method == "POST":
+                Recipe.objects.create(title="new recipe", excerpt="test")
+            self.read_alias = ReplicaRouter().db_for_read(Recipe)
+            return HttpResponse(Recipe.objects.filter(title="new recipe").exists())
+
+        request = getattr(self.factory, method)("/")
+        request.COOKIES.update(cookies or {})
+        return ReadYourWritesMiddleware(view)(request)
+
+    def test_pinned_session_reads_its_write_from_primary(self):
+        response = self.request("post")
+        self.assertEqual(response.content, b"True")
+        self.assertEqual(response.cookies[PIN_COOKIE_NAME].value, "1")
+        self.assertTrue(Recipe.objects.using("default").filter(title="new recipe").exists())
+
+        response = self.request("get")
+        self.assertEqual(self.read_alias, SNAPSHOT_REPLICA)
+        self.assertEqual(response.content, b"False")
+
+        response = self.request("get", {PIN_COOKIE_NAME: "1"})
+        self.assertEqual(self.read_alias, "default")
+        self.assertEqual(response.content, b"True")
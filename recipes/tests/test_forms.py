@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
 from django.http import HttpRequest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from io import BytesIO
 from os import path, remove
+from unittest import mock
+from PIL import Image
 
 
 from recipes.models import Recipe, Review
@@ -55,6 +58,44 @@ class RecipeFormTests(TestCase):
         )
         self.assertFalse(form.is_valid())
 
+    def image_form(self, image):
+        return RecipeForm(
+            data={
+                "title": "Test",
+                "excerpt": "test excerpt",
+                "ingredients": "test ingredients",
+                "preparation": "test preparation",
+                "serving": "test serving",
+            },
+            files={"image": image},
+        )
+
+    def png(self, size):
+        buffer = BytesIO()
+        Image.new("RGB", size).save(buffer, "PNG")
+        return SimpleUploadedFile(name="test.png", content=buffer.getvalue(), content_type="image/png")
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=50)
+    def test_form_rejects_image_over_max_size(self):
+        form = self.image_form(self.png((50, 50)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()["image"][0].code, "file_too_large")
+
+    @override_settings(IMAGE_UPLOAD_MAX_DIMENSION=80)
+    def test_form_rejects_image_over_max_dimension_from_header(self):
+        with mock.patch("PIL.PngImagePlugin.PngImageFile.verify") as verify:
+            form = self.image_form(self.png((100, 20)))
+            self.assertFalse(form.is_valid())
+        verify.assert_not_called()
+        self.assertEqual(form.errors["image"], ["The image may be at most 80 pixels wide and high, it is 100×20."])
+
+    @override_settings(IMAGE_UPLOAD_MAX_PIXELS=1_000_000)
+    def test_form_rejects_image_over_max_pixels(self):
+        form = self.image_form(self.png((1001, 1000)))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()["image"][0].code, "too_many_pixels")
+        self.assertTrue(self.image_form(self.png((1000, 1000))).is_valid())
+
     def test_can_save_valid_form_from_post(self):
         request = HttpRequest()
         request.POST = {
@@ -173,6 +214,24 @@ class RecipeFormTests(TestCase):
         with self.assertRaises(ValueError):
             form.save()
 
+    def test_saving_form_updates_structured_ingredients(self):
+        data = {
+            "title": "Test",
+            "excerpt": "test excerpt",
+            "ingredients": "400 g chickpeas\n2 tbsp tahini",
+            "preparation": "test preparation",
+            "serving": "test serving",
+        }
+        recipe = RecipeForm(data=data).save()
+        self.assertEqual(list(recipe.ingredient_set.values_list("name", flat=True)), ["chickpea", "tahini"])
+
+        data["ingredients"] = "400 g chickpeas\n1 lemon"
+        RecipeForm(data=data, instance=recipe).save()
+        self.assertEqual(
+            list(recipe.recipe_ingredients.values_list("ingredient__name", "quantity", "unit")),
+            [("chickpea", 400, "g"), ("lemon", 1, "")],
+        )
+
     def test_form_from_instance(self):
         author = get_user_model().objects.create_user(username="username", email="test@test.com", password="1234")
         recipe = Recipe.objects.create(
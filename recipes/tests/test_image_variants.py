@@ -0,0 +1,169 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from custom.images import generate_image_variants, supported_variant_formats
+from jobs.models import Job
+from jobs.queue import run_pending_jobs
+from recipes.models import Recipe
+
+
+def jpeg_upload(name="photo.jpg", size=(1600, 1200)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "orange").save(buffer, "JPEG")
+    return SimpleUploadedFile(name=name, content=buffer.getvalue(), content_type="image/jpeg")
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ENABLED=True, IMAGE_VARIANT_SIZES=[80, 160]
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_upload_queues_variants_and_shows_placeholder(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        self.assertEqual(recipe.image_variants, {"source": "images/photo.jpg", "pending": True})
+        job = Job.objects.get()
+        self.assertEqual(job.name, "images.generate_variants")
+        self.assertEqual(job.payload["source"], "images/photo.jpg")
+        self.assertFalse(default_storage.exists("variants/images/photo/80.jpeg"))
+        response = self.client.get(reverse("recipe-list"))
+        self.assertContains(response, 'src="/static/images/placeholder.svg"')
+        self.assertNotContains(response, 'src="/media/images/photo.jpg"')
+
+        run_pending_jobs()
+        self.assertFalse(Job.objects.exists())
+        response = self.client.get(reverse("recipe-list"))
+        self.assertContains(response, 'src="/media/variants/images/photo/80.jpeg"')
+
+    def test_variants_generated_by_worker(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        run_pending_jobs()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants["source"], "images/photo.jpg")
+        self.assertEqual(set(recipe.image_variants["variants"]), set(supported_variant_formats()))
+        self.assertIn("webp", recipe.image_variants["variants"])
+        name = recipe.image_variants["variants"]["webp"]["160"]
+        self.assertEqual(name, "variants/images/photo/160.webp")
+        with default_storage.open(name) as variant:
+            self.assertEqual(Image.open(variant).size, (160, 120))
+
+    def test_transparency_kept_except_in_jpeg(self):
+        buffer = BytesIO()
+        image = Image.new("RGBA", (400, 400), (0, 0, 0, 0))
+        image.paste((255, 0, 0, 255), (100, 100, 300, 300))
+        image.save(buffer, "PNG")
+        upload = SimpleUploadedFile(name="logo.png", content=buffer.getvalue(), content_type="image/png")
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=upload)
+        run_pending_jobs()
+        recipe.refresh_from_db()
+        with default_storage.open(recipe.image_variants["variants"]["webp"]["80"]) as variant:
+            variant = Image.open(variant)
+            self.assertEqual(variant.mode, "RGBA")
+            self.assertEqual(variant.getpixel((0, 0))[3], 0)
+        with default_storage.open(recipe.image_variants["variants"]["jpeg"]["80"]) as variant:
+            variant = Image.open(variant)
+            self.assertEqual(variant.mode, "RGB")
+            self.assertTrue(all(channel > 250 for channel in variant.getpixel((0, 0))))
+
+    def test_variants_regenerated_only_when_image_changes(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        run_pending_jobs()
+        recipe.refresh_from_db()
+        manifest = recipe.image_variants
+        recipe.title = "new title"
+        recipe.save()
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(recipe.image_variants, manifest)
+        recipe.image = jpeg_upload("other.jpg")
+        recipe.save()
+        self.assertEqual(Job.objects.get().payload["source"], "images/other.jpg")
+
+    def test_superseded_job_does_nothing(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        recipe.image = jpeg_upload("other.jpg")
+        recipe.save()
+        with mock.patch("custom.images.generate_image_variants", wraps=generate_image_variants) as generate:
+            run_pending_jobs()
+        generate.assert_called_once()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants["source"], "images/other.jpg")
+
+    def test_failed_variants_fall_back_to_original(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        job = Job.objects.get()
+        with mock.patch("custom.images.generate_image_variants", side_effect=OSError("storage unavailable")):
+            with self.assertLogs("jobs.queue", "WARNING"):
+                for attempt in range(job.max_attempts):
+                    Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+                    run_pending_jobs()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {"source": "images/photo.jpg", "failed": True})
+        response = self.client.get(reverse("recipe-list"))
+        self.assertContains(response, 'src="/media/images/photo.jpg"')
+        self.assertNotContains(response, "placeholder.svg")
+
+        call_command("generate_image_variants", stdout=StringIO())
+        recipe.refresh_from_db()
+        self.assertIn("variants", recipe.image_variants)
+
+    def test_default_and_unreadable_images_have_no_variants(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test")
+        self.assertEqual(recipe.image_variants, {})
+        broken = SimpleUploadedFile(name="broken.jpg", content=b"not an image", content_type="image/jpeg")
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=broken)
+        with self.assertLogs("custom.images", "ERROR"):
+            run_pending_jobs()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants, {})
+        self.assertFalse(Job.objects.exists())
+
+    def test_recipe_list_serves_variants_through_srcset(self):
+        Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        run_pending_jobs()
+        response = self.client.get(reverse("recipe-list"))
+        self.assertContains(response, '<source type="image/webp" srcset="/media/variants/images/photo/80.webp 1x, /media/variants/images/photo/160.webp 2x">')
+        self.assertContains(response, 'src="/media/variants/images/photo/80.jpeg"')
+        self.assertNotContains(response, 'src="/media/images/photo.jpg"')
+
+    def test_picture_falls_back_to_original_without_variants(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test")
+        response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertContains(response, 'src="/media/images/default.jpg"')
+        self.assertNotContains(response, "<source")
+
+    def test_profile_image_variants(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        user.profile_image = jpeg_upload("avatar.jpg")
+        user.save()
+        run_pending_jobs()
+        user.refresh_from_db()
+        self.assertEqual(user.profile_image_variants["variants"]["jpeg"]["80"], "variants/images/avatar/80.jpeg")
+        response = self.client.get(reverse("user-detail", kwargs={"slug": user.username}))
+        self.assertContains(response, 'alt="test&#x27;s profile picture"')
+
+    def test_generate_image_variants_command(self):
+        with override_settings(IMAGE_VARIANTS_ENABLED=False):
+            recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=jpeg_upload())
+        self.assertEqual(recipe.image_variants, {})
+        out = StringIO()
+        call_command("generate_image_variants", stdout=out)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_variants["source"], "images/photo.jpg")
+        self.assertIn("Updated image variants of recipes.", out.getvalue())
@@ -1,15 +1,19 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 from django.core.files.uploadedfile import SimpleUploadedFile
 from os import path, remove
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import FieldError, ObjectDoesNotExist
 from django.db import IntegrityError
+from unittest import mock
 
-from recipes.models import Recipe, Review
+from decimal import Decimal
+
+from recipes.ingredients import parse_ingredients
+from recipes.models import Ingredient, Recipe, Review
 
 
 class RecipeTests(TestCase):
@@ -73,6 +77,37 @@ class RecipeTests(TestCase):
         self.assertEqual(recipe.slug, "test-recipe")
         self.assertEqual(recipe2.slug, "test-recipe-1")
 
+    def test_slug_allocation_query_count_independent_of_duplicates(self):
+        Recipe.objects.create(title="test recipe")
+        Recipe.objects.create(title="test recipe")
+        with self.assertNumQueries(2):
+            self.assertEqual(Recipe.objects.allocate_slug("test recipe"), "test-recipe-2")
+        Recipe.objects.bulk_create(Recipe(title="test recipe", slug=f"test-recipe-{i}") for i in range(3, 100))
+        Recipe.objects.resync_slug_counter("test-recipe")
+        with self.assertNumQueries(2):
+            self.assertEqual(Recipe.objects.allocate_slug("test recipe"), "test-recipe-100")
+
+    def test_slug_allocation_skips_slugs_taken_without_counter(self):
+        Recipe.objects.create(title="test recipe")
+        Recipe.objects.bulk_create(Recipe(title="test recipe", slug=f"test-recipe-{i}") for i in range(1, 4))
+        recipe = Recipe.objects.create(title="test recipe")
+        self.assertEqual(recipe.slug, "test-recipe-4")
+        recipe = Recipe.objects.create(title="test recipe 5")
+        self.assertEqual(recipe.slug, "test-recipe-5")
+        recipe = Recipe.objects.create(title="test recipe")
+        self.assertEqual(recipe.slug, "test-recipe-6")
+
+    def test_slug_allocation_retries_on_concurrent_create(self):
+        Recipe.objects.create(title="test recipe")
+        allocate_slug = Recipe.objects.allocate_slug
+        taken_slugs = iter(["test-recipe"])
+        with mock.patch.object(
+            type(Recipe.objects), "allocate_slug", side_effect=lambda title: next(taken_slugs, None) or allocate_slug(title)
+        ) as mocked_allocate_slug:
+            recipe = Recipe.objects.create(title="test recipe")
+        self.assertEqual(mocked_allocate_slug.call_count, 2)
+        self.assertEqual(recipe.slug, "test-recipe-1")
+
     def test_changing_title_does_not_change_slug(self):
         user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
         recipe = Recipe.objects.create(author=user, title="test recipe")
@@ -137,12 +172,157 @@ class RecipeTests(TestCase):
         review3 = Review.objects.create(author=user3, recipe=recipe, rating=3, content="test")
         self.assertEqual(recipe.get_avg_rating(), (review.rating + review2.rating + review3.rating)/3)
 
+    def test_rating_aggregates_updated_on_review_create_edit_delete(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        user2 = get_user_model().objects.create_user(username="test2", email="test2@test.com", password="1234")
+        recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (0, 0, None))
+        review = Review.objects.create(author=user, recipe=recipe, rating=2, content="test")
+        Review.objects.create(author=user2, recipe=recipe, rating=5, content="test")
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (7, 2, 3.5))
+        review.rating = 4
+        review.save()
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (9, 2, 4.5))
+        review.delete()
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (5, 1, 5.0))
+        Review.objects.filter(recipe=recipe).delete()
+        recipe.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (0, 0, None))
+        self.assertEqual(recipe.get_avg_rating(), "-")
+
+    def test_rating_aggregates_moved_with_review(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
+        recipe2 = Recipe.objects.create(author=user, title="test recipe2", excerpt="test")
+        review = Review.objects.create(author=user, recipe=recipe, rating=3, content="test")
+        review.recipe = recipe2
+        review.save()
+        recipe.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual((recipe.rating_sum, recipe.rating_count, recipe.avg_rating), (0, 0, None))
+        self.assertEqual((recipe2.rating_sum, recipe2.rating_count, recipe2.avg_rating), (3, 1, 3.0))
+
+    @override_settings(POPULAR_RECIPES_MIN_REVIEWS=2, POPULAR_RECIPES_PRIOR_MEAN=3.0, POPULAR_RECIPES_PRIOR_WEIGHT=2.0)
+    def test_popularity_score_requires_min_reviews(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        user2 = get_user_model().objects.create_user(username="test2", email="test2@test.com", password="1234")
+        recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
+        review = Review.objects.create(author=user, recipe=recipe, rating=5, content="test")
+        recipe.refresh_from_db()
+        self.assertIsNone(recipe.popularity_score)
+        Review.objects.create(author=user2, recipe=recipe, rating=5, content="test")
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.popularity_score, (5 + 5 + 2 * 3.0) / (2 + 2))
+        review.delete()
+        recipe.refresh_from_db()
+        self.assertIsNone(recipe.popularity_score)
+
+    def test_get_avg_rating_does_not_query(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
+        Review.objects.create(author=user, recipe=recipe, rating=4, content="test")
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(recipe.get_avg_rating(), 4.0)
+
     def test_get_user_review(self):
         user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
         recipe = Recipe.objects.create(author=user, title="test recipe", excerpt="test")
         review = Review.objects.create(author=user, recipe=recipe, rating=3, content="test")
         self.assertEqual(recipe.get_user_review(user), review)
 
+    def test_summaries_defer_large_text_fields(self):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        Recipe.objects.create(author=user, title="test recipe", excerpt="test", preparation="x" * 10000)
+        recipe = Recipe.objects.summaries().get()
+        self.assertEqual(recipe.get_deferred_fields(), {"ingredients", "preparation", "serving"})
+        self.assertEqual(recipe.author.get_deferred_fields() & {"username", "id"}, set())
+        with self.assertNumQueries(0):
+            self.assertEqual(recipe.author.username, "test")
+
+    def test_deferred_field_access_raises_when_guarded(self):
+        Recipe.objects.create(title="test recipe", excerpt="test", preparation="test preparation")
+        recipe = Recipe.objects.summaries().get()
+        with override_settings(RAISE_ON_DEFERRED_FIELD_ACCESS=True), self.assertRaises(FieldError):
+            recipe.preparation
+        with override_settings(RAISE_ON_DEFERRED_FIELD_ACCESS=False):
+            self.assertEqual(recipe.preparation, "test preparation")
+
+
+class IngredientTests(TestCase):
+    def create_recipe(self, title, ingredients):
+        return Recipe.objects.create(
+            title=title, excerpt="test", ingredients=ingredients, preparation="test", serving="test"
+        )
+
+    def test_parse_ingredients(self):
+        parsed = parse_ingredients("- 1 1/2 cups of Chickpeas (drained)\n2,5 g salt\n½ Lemon\nFresh tomatoes\n\n")
+        self.assertEqual(
+            [(ingredient.normalized_name, ingredient.quantity, ingredient.unit) for ingredient in parsed],
+            [
+                ("chickpea", Decimal("1.5"), "cup"),
+                ("salt", Decimal("2.5"), "g"),
+                ("lemon", Decimal("0.5"), ""),
+                ("fresh tomato", None, ""),
+            ],
+        )
+        self.assertEqual(parsed[0].name, "Chickpeas (drained)")
+
+    def test_parse_single_line_ingredients(self):
+        parsed = parse_ingredients("flour, eggs; milk")
+        self.assertEqual([ingredient.normalized_name for ingredient in parsed], ["flour", "egg", "milk"])
+
+    def test_parse_quantity_that_does_not_fit_field(self):
+        parsed = parse_ingredients("123456789 g sugar\n1234567.0001 g salt\n1/3 cup milk")
+        self.assertEqual([ingredient.quantity for ingredient in parsed], [None, Decimal("1234567.000"), Decimal("0.333")])
+        recipe = self.create_recipe("sweet", "123456789 g sugar")
+        self.assertIsNone(recipe.recipe_ingredients.get().quantity)
+
+    def test_save_replaces_previous_structured_ingredients(self):
+        recipe = self.create_recipe("hummus", "chickpeas\ntahini\nlemon")
+        recipe.ingredients = "chickpeas\ngarlic"
+        recipe.save()
+        self.assertEqual(list(recipe.recipe_ingredients.values_list("name", flat=True)), ["chickpeas", "garlic"])
+        self.assertEqual(Ingredient.objects.count(), 4)
+
+    def test_save_syncs_structured_ingredients_only_when_changed(self):
+        self.create_recipe("hummus", "chickpeas\ntahini\nlemon")
+        recipe = Recipe.objects.get(title="hummus")
+        with mock.patch("recipes.models.store_ingredients") as store:
+            recipe.title = "smooth hummus"
+            recipe.save()
+            store.assert_not_called()
+            recipe.ingredients = "chickpeas\ngarlic"
+            recipe.save()
+            store.assert_called_once_with([recipe], Ingredient, mock.ANY)
+            recipe.save()
+            store.assert_called_once()
+
+    def test_with_all_ingredients(self):
+        hummus = self.create_recipe("hummus", "chickpeas\ntahini\nlemon")
+        falafel = self.create_recipe("falafel", "chickpeas\nparsley\nchickpeas")
+        self.create_recipe("lemonade", "lemon\nsugar\nwater")
+        self.assertCountEqual(Recipe.objects.with_all_ingredients(["Chickpeas"]), [hummus, falafel])
+        self.assertCountEqual(Recipe.objects.with_all_ingredients(["chickpea", "lemons"]), [hummus])
+        self.assertCountEqual(Recipe.objects.with_all_ingredients(["chickpea", "sugar"]), [])
+
+    def test_cookable_with(self):
+        hummus = self.create_recipe("hummus", "chickpeas\ntahini\nlemon")
+        lemonade = self.create_recipe("lemonade", "lemon\nsugar\nwater")
+        self.create_recipe("empty", "")
+        pantry = ["chickpeas", "tahini", "lemons", "sugar", "water", "salt"]
+        self.assertCountEqual(Recipe.objects.cookable_with(pantry), [hummus, lemonade])
+        self.assertCountEqual(Recipe.objects.cookable_with(pantry[1:]), [lemonade])
+
+    def test_cookable_with_runs_one_query(self):
+        self.create_recipe("hummus", "chickpeas\ntahini\nlemon")
+        with self.assertNumQueries(1):
+            list(Recipe.objects.cookable_with(["chickpeas", "tahini", "lemon"]))
+
+
 class ReviewTests(TestCase):
     def test_create_review(self):
         user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
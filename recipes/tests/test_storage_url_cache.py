@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe
+from storage import url_cache
+
+
+class FakeStorage:
+    base_url = "https://media.example.com/"
+    expiration_secs = None
+
+    def __init__(self):
+        self.calls = 0
+
+    def url(self, name):
+        self.calls += 1
+        return f"{self.base_url}{name}?v={self.calls}"
+
+
+class StorageURLCacheTests(TestCase):
+    def setUp(self):
+        url_cache.local_urls.clear()
+        self.addCleanup(url_cache.local_urls.clear)
+        self.storage = FakeStorage()
+
+    def test_url_resolved_once_per_name(self):
+        self.assertEqual(url_cache.cached_url(self.storage, "images/a.jpg"), "https://media.example.com/images/a.jpg?v=1")
+        self.assertEqual(url_cache.cached_url(self.storage, "images/a.jpg"), "https://media.example.com/images/a.jpg?v=1")
+        self.assertEqual(url_cache.cached_url(self.storage, "images/b.jpg"), "https://media.example.com/images/b.jpg?v=2")
+        self.assertEqual(self.storage.calls, 2)
+        self.assertIsNone(url_cache.cached_url(self.storage, ""))
+
+    def test_urls_keyed_by_storage_location(self):
+        other = FakeStorage()
+        other.base_url = "https://other.example.com/"
+        url_cache.cached_url(self.storage, "images/a.jpg")
+        self.assertEqual(url_cache.cached_url(other, "images/a.jpg"), "https://other.example.com/images/a.jpg?v=1")
+
+    @override_settings(STORAGE_URL_CACHE_SIZE=2)
+    def test_least_recently_used_url_evicted(self):
+        for name in ("a", "b", "a", "c"):
+            url_cache.cached_url(self.storage, name)
+        self.assertEqual(self.storage.calls, 3)
+        url_cache.cached_url(self.storage, "a")
+        self.assertEqual(self.storage.calls, 3)
+        url_cache.cached_url(self.storage, "b")
+        self.assertEqual(self.storage.calls, 4)
+
+    def test_expired_url_resolved_again(self):
+        url_cache.cached_url(self.storage, "a")
+        with mock.patch("time.monotonic", return_value=10**12):
+            url_cache.cached_url(self.storage, "a")
+        self.assertEqual(self.storage.calls, 2)
+
+    def test_signed_urls_cached_for_half_their_lifetime(self):
+        self.storage.expiration_secs = 600
+        self.assertEqual(url_cache.url_timeout(self.storage), 300)
+        self.storage.expiration_secs = None
+        self.assertEqual(url_cache.url_timeout(self.storage), settings.STORAGE_URL_CACHE_TIMEOUT)
+
+    def test_storage_failure_remembered(self):
+        self.storage.url = mock.Mock(side_effect=ConnectionError)
+        with self.assertLogs("storage.url_cache", "ERROR"):
+            self.assertIsNone(url_cache.cached_url(self.storage, "a"))
+        self.assertIsNone(url_cache.cached_url(self.storage, "a"))
+        self.assertEqual(self.storage.url.call_count, 1)
+
+    @override_settings(STORAGE_URL_SHARED_CACHE="default")
+    def test_shared_cache_tier(self):
+        self.addCleanup(cache.clear)
+        url = url_cache.cached_url(self.storage, "a")
+        url_cache.local_urls.clear()
+        self.assertEqual(url_cache.cached_url(self.storage, "a"), url)
+        self.assertEqual(self.storage.calls, 1)
+        url_cache.invalidate_url(self.storage, "a")
+        self.assertEqual(url_cache.cached_url(self.storage, "a"), "https://media.example.com/a?v=2")
+
+    def test_recipe_image_url_cached(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test")
+        with mock.patch("django.core.files.storage.FileSystemStorage.url", return_value="/media/images/default.jpg") as storage_url:
+            for _ in range(3):
+                self.assertEqual(recipe.recipe_image_url_or_default(), "/media/images/default.jpg")
+        self.assertEqual(storage_url.call_count, 1)
+
+    def test_failing_storage_falls_back_to_default_image(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test")
+        with mock.patch("django.core.files.storage.FileSystemStorage.url", side_effect=ConnectionError), self.assertLogs("storage.url_cache"):
+            self.assertEqual(recipe.recipe_image_url_or_default(), settings.MEDIA_URL + "images/default.jpg")
+
+    def test_changed_image_invalidates_cached_url(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test")
+        recipe.image = "images/photo.jpg"
+        recipe.save()
+        self.assertEqual(recipe.recipe_image_url_or_default(), "/media/images/photo.jpg")
+        with mock.patch("custom.images.invalidate_url") as invalidate_url:
+            recipe.image_variants = {"source": "images/old.jpg"}
+            recipe.save()
+        invalidate_url.assert_called_once_with(recipe.image.storage, "images/photo.jpg")
@@ -1,14 +1,15 @@
 from http import HTTPStatus
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.urls import reverse
 import datetime
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
 
-from recipes.models import Recipe
+from custom.testing import QueryBudgetTestMixin
+from recipes.models import Recipe, Review
 
-class IndexViewTests(TestCase):
+class IndexViewTests(QueryBudgetTestMixin, TestCase):
     @classmethod
     def setUpTestData(cls):
         user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
@@ -30,6 +31,12 @@ class IndexViewTests(TestCase):
         self.assertTemplateUsed(response, "recipes/index.html")
         self.assertContains(response, "<p>DishRecipes</p>", html=True, status_code=HTTPStatus.OK)
 
+    def test_index_within_query_budget(self):
+        self.assertWithinQueryBudget(reverse("index"))
+
+    def test_index_queries_use_indexes(self):
+        self.assertQueriesUseIndexes(reverse("index"))
+
     def test_index_shows_three_newest_recipes(self):
         response = self.client.get(reverse("index"))
         newest_recipes = Recipe.objects.all().order_by("-created_date")[:3]
@@ -53,8 +60,13 @@ class IndexViewTests(TestCase):
                 )
 
     def test_index_shows_three_highest_rated_recipes(self):
+        for rating, recipe in enumerate(Recipe.objects.order_by("id")[:4], start=2):
+            for _ in range(settings.POPULAR_RECIPES_MIN_REVIEWS):
+                Review.objects.create(author=None, recipe=recipe, rating=rating, content="test")
         response = self.client.get(reverse("index"))
-        popular_recipes = Recipe.objects.annotate(avg_rating=Avg("reviews__rating")).order_by("-avg_rating")[:3]
+        popular_recipes = Recipe.objects.popular()[:3]
+        self.assertEqual(len(popular_recipes), 3)
+        self.assertEqual(list(response.context_data["popular_recipes"]), list(popular_recipes))
         for i in range(len(popular_recipes)):
             self.assertContains(
                 response,
@@ -72,4 +84,25 @@ class IndexViewTests(TestCase):
                     response,
                     f'<p>{popular_recipes[i].created_date.strftime("%b %d, %Y")}</p>',
                     html=True,
-                )
\ No newline at end of file
+                )
+
+    def test_index_revalidated_after_author_rename(self):
+        etag = self.client.get(reverse("index"))["ETag"]
+        author = get_user_model().objects.get(username="test")
+        author.username = "renamed"
+        author.save()
+        response = self.client.get(reverse("index"), HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, ">renamed</a>")
+
+    @override_settings(POPULAR_RECIPES_MIN_REVIEWS=2, POPULAR_RECIPES_PRIOR_MEAN=3.0, POPULAR_RECIPES_PRIOR_WEIGHT=2.0)
+    def test_index_popular_recipes_ranked_by_weighted_score(self):
+        recipes = list(Recipe.objects.order_by("id"))
+        ratings = {0: [5], 1: [5, 5], 2: [5, 5, 5, 5, 5, 5, 5, 4], 3: [1, 1, 1], 4: [5, 4]}
+        for i, recipe_ratings in ratings.items():
+            for rating in recipe_ratings:
+                Review.objects.create(author=None, recipe=recipes[i], rating=rating, content="test")
+        response = self.client.get(reverse("index"))
+        self.assertEqual(
+            [recipe.pk for recipe in response.context_data["popular_recipes"]],
+            [recipes[2].pk, recipes[1].pk, recipes[4].pk],
+        )
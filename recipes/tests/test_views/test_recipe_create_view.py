@@ -1,9 +1,10 @@
 from http import HTTPStatus
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from os import remove
+from unittest import mock
 
 from recipes.models import Recipe
 
@@ -125,3 +126,24 @@ class RecipeCreateTests(TestCase):
         )
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertEqual(Recipe.objects.count(), 0)
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=1024)
+    def test_post_recipe_create_oversized_image_rejected_while_streaming(self):
+        author = get_user_model().objects.get(pk=1)
+        self.client.login(username=author.username, password="Test12345")
+        with mock.patch("django.core.files.uploadhandler.MemoryFileUploadHandler.receive_data_chunk") as buffered:
+            response = self.client.post(
+                reverse("recipe-create"),
+                data={
+                    "image": SimpleUploadedFile(name="big.png", content=b"\x00" * 100_000, content_type="image/png"),
+                    "title": "Test",
+                    "excerpt": "Test",
+                    "ingredients": "Test",
+                    "preparation": "Test",
+                    "serving": "Test",
+                },
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context["form"].errors["image"], ["The image may not be larger than 1.0\xa0KB."])
+        self.assertLessEqual(sum(len(call.args[0]) for call in buffered.call_args_list), 1024)
+        self.assertEqual(Recipe.objects.count(), 0)
@@ -1,8 +1,10 @@
 from http import HTTPStatus
+from unittest import mock
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from custom.testing import QueryBudgetTestMixin
 from recipes.models import Recipe, Review
 
 
@@ -92,7 +94,7 @@ class RecipeDetailTests(TestCase):
         self.assertContains(response, "Open recipe settings", html=True, status_code=HTTPStatus.OK)
 
 
-class RecipeDetailReviewTests(TestCase):
+class RecipeDetailReviewTests(QueryBudgetTestMixin, TestCase):
     def setUp(self):
         author = get_user_model().objects.create_user(username="Author", email="author@test.com", password="Test12345")
         recipe = Recipe.objects.create(
@@ -114,6 +116,43 @@ class RecipeDetailReviewTests(TestCase):
                 content=f"Test {i}",
             )
 
+    def test_recipe_reviews_use_index(self):
+        recipe = Recipe.objects.get(pk=1)
+        self.assertQueriesUseIndexes(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+
+    def test_recipe_detail_within_query_budget(self):
+        recipe = Recipe.objects.get(pk=1)
+        self.assertWithinQueryBudget(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        for i in range(5, 20):
+            user = get_user_model().objects.create_user(
+                username=f"Test{i}", email=f"test{i}@test.com", password="Test12345"
+            )
+            Review.objects.create(author=user, recipe=recipe, rating=3, content=f"Test {i}")
+        self.assertWithinQueryBudget(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+
+    def test_user_review_taken_from_shown_reviews(self):
+        recipe = Recipe.objects.get(pk=1)
+        user = get_user_model().objects.get(username="Test4")
+        self.client.login(username=user.username, password="Test12345")
+        # Session, user, recipe with its author and reviews with their authors.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertEqual(response.context["user_review"].content, "Test 4")
+
+    def test_user_review_not_shown_fetched_separately(self):
+        recipe = Recipe.objects.get(pk=1)
+        user = get_user_model().objects.get(username="Test0")
+        for i in range(5, 15):
+            other = get_user_model().objects.create_user(
+                username=f"Test{i}", email=f"test{i}@test.com", password="Test12345"
+            )
+            Review.objects.create(author=other, recipe=recipe, rating=3, content=f"Test {i}")
+        self.client.login(username=user.username, password="Test12345")
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertEqual(response.context["user_review"].content, "Test 0")
+        self.assertContains(response, "<h4>Your review</h4>", html=True)
+
     def test_get_recipe_reviews(self):
         recipe = Recipe.objects.get(pk=1)
         response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
@@ -175,14 +214,18 @@ class RecipeDetailReviewTests(TestCase):
         self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
         self.client.login(username=user.username, password="Test12345")
         response = self.client.post(reverse("recipe-detail", kwargs={"slug": recipe.slug}), data={"rating":3,"content":"Test"})
-        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertRedirects(response, reverse("recipe-detail", kwargs={"slug": recipe.slug}))
 
     def test_post_review_form_valid_data(self):
         recipe = Recipe.objects.get(pk=1)
         user = get_user_model().objects.create_user(username="Test", email="test@test.com", password="Test12345")
         self.client.login(username=user.username, password="Test12345")
-        response = self.client.post(reverse("recipe-detail", kwargs={"slug": recipe.slug}), data={"rating":3,"content":"Test"})
-        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.post(
+            reverse("recipe-detail", kwargs={"slug": recipe.slug}), data={"rating":3,"content":"Test"}, follow=True
+        )
+        self.assertRedirects(response, reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertContains(response, "Your review has been added.")
+        self.assertContains(response, "<h4>Your review</h4>", html=True)
         review = recipe.get_user_review(user)
         self.assertEqual(review.author, user)
         self.assertEqual(review.recipe, recipe)
@@ -228,4 +271,64 @@ class RecipeDetailReviewTests(TestCase):
             response,
             f'<div class="px-3 pb-3">{review.content}</div>',
             html=True,
-        )
\ No newline at end of file
+        )
+
+    def test_detail_sends_validators(self):
+        recipe = Recipe.objects.get(pk=1)
+        response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+        user = get_user_model().objects.get(username="Test0")
+        self.client.login(username=user.username, password="Test12345")
+        user_response = self.client.get(reverse("recipe-detail", kwargs={"slug": recipe.slug}))
+        self.assertNotEqual(user_response["ETag"], response["ETag"])
+        self.assertIn("private", user_response["Cache-Control"])
+
+    def test_pending_messages_disable_not_modified(self):
+        recipe = Recipe.objects.get(pk=1)
+        url = reverse("recipe-detail", kwargs={"slug": recipe.slug})
+        etag = self.client.get(url)["ETag"]
+        with mock.patch("custom.conditional.get_messages", return_value=["Review deleted."]):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.has_header("ETag"))
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_conditional_get_returns_not_modified_without_rendering(self):
+        recipe = Recipe.objects.get(pk=1)
+        url = reverse("recipe-detail", kwargs={"slug": recipe.slug})
+        response = self.client.get(url)
+        with self.assertNumQueries(1), self.assertTemplateNotUsed("recipes/recipe_detail.html"):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, HTTPStatus.NOT_MODIFIED)
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(revalidated.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_review_and_deleted_review_change_etag(self):
+        recipe = Recipe.objects.get(pk=1)
+        url = reverse("recipe-detail", kwargs={"slug": recipe.slug})
+        etag = self.client.get(url)["ETag"]
+        review = Review.objects.get(author__username="Test0")
+        review.content = "Edited"
+        review.save()
+        edited_etag = self.client.get(url, HTTP_IF_NONE_MATCH=etag)["ETag"]
+        self.assertNotEqual(edited_etag, etag)
+        Review.objects.get(author__username="Test1").delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=edited_etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_renamed_author_and_reviewer_change_validators(self):
+        recipe = Recipe.objects.get(pk=1)
+        url = reverse("recipe-detail", kwargs={"slug": recipe.slug})
+        response = self.client.get(url)
+        for username, new_username in (("Author", "Renamed author"), ("Test0", "Renamed reviewer")):
+            user = get_user_model().objects.get(username=username)
+            user.username = new_username
+            user.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertContains(response, new_username)
+        get_user_model().objects.get(username="Test1").delete()
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, HTTPStatus.OK)
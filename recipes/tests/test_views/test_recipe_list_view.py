@@ -1,16 +1,20 @@
 import math
 from http import HTTPStatus
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.db.models import Avg
+from django.core.cache import caches
 
 
+from custom.testing import QueryBudgetTestMixin
 from recipes.models import Recipe, Review
 
 
-class RecipeListViewTests(TestCase):
+class RecipeListViewTests(QueryBudgetTestMixin, TestCase):
     num_of_recipes = 11
     paginate_by = 5
     recipe_list_template = "recipes/recipe_list.html"
@@ -55,6 +59,76 @@ class RecipeListViewTests(TestCase):
         response = self.client.get(reverse("recipe-list"))
         self.assertEqual(response.context_data["paginator"].count, self.num_of_recipes)
 
+    def test_recipe_list_within_query_budget(self):
+        self.assertWithinQueryBudget(reverse("recipe-list"), data={"paginate_by": "50"})
+
+    def test_recipe_list_revalidated_per_page(self):
+        response = self.client.get(reverse("recipe-list"))
+        etag = response["ETag"]
+        with self.assertTemplateNotUsed(self.recipe_list_template):
+            response = self.client.get(reverse("recipe-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertIn("public", response["Cache-Control"])
+        second_page = self.client.get(reverse("recipe-list"), data={"page": 2})
+        self.assertNotEqual(second_page["ETag"], etag)
+        recipe = Recipe.objects.get(title=f"test recipe {self.num_of_recipes}")
+        Review.objects.create(author=None, recipe=recipe, rating=4, content="new review")
+        response = self.client.get(reverse("recipe-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get(reverse("recipe-list"), data={"page": 2}, HTTP_IF_NONE_MATCH=second_page["ETag"])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_recipe_list_revalidated_after_author_rename_and_delete(self):
+        response = self.client.get(reverse("recipe-list"))
+        self.assertFalse(response.has_header("Last-Modified"))
+        author = get_user_model().objects.get(username="test")
+        author.username = "renamed"
+        author.save()
+        response = self.client.get(reverse("recipe-list"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertContains(response, ">renamed</a>")
+        Recipe.objects.get(title=f"test recipe {self.num_of_recipes}").delete()
+        response = self.client.get(reverse("recipe-list"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, f"Test Recipe {self.num_of_recipes}<")
+
+    def test_recipe_list_queries_use_indexes(self):
+        self.assertQueriesUseIndexes(reverse("recipe-list"))
+        response = self.assertQueriesUseIndexes(reverse("recipe-list"), data={"cursor": ""})
+        self.assertQueriesUseIndexes(reverse("recipe-list"), data={"cursor": response.context_data["page_obj"].next_cursor})
+
+    def test_recipe_summary_cache_follows_recipe_and_review_changes(self):
+        self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        recipe = Recipe.objects.get(title="test recipe 1")
+        self.assertEqual(len(caches["fragments"].get_many(recipe.get_summary_cache_keys())), 2)
+        recipe.title = "changed title"
+        recipe.save()
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        self.assertContains(response, "Changed Title")
+        self.assertNotContains(response, "Test Recipe 1<")
+        Review.objects.create(author=None, recipe=recipe, rating=2, content="test")
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.get_avg_rating(), 2.0)
+        self.assertContains(response, "<p>Rating: 2.0/5</p>", html=True)
+
+    def test_recipe_summary_cache_follows_author_changes(self):
+        self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        author = get_user_model().objects.get(username="test")
+        author.username = "renamed"
+        author.save()
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        self.assertContains(response, ">renamed</a>", Recipe.objects.filter(author=author).count())
+        self.assertNotContains(response, ">test</a>")
+        authorless = Recipe.objects.get(title="test recipe 5")
+        self.assertEqual(len(caches["fragments"].get_many(authorless.get_summary_cache_keys())), 2)
+
+    def test_recipe_summary_owner_buttons_rendered_per_request(self):
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        self.assertNotContains(response, 'title="Edit recipe"')
+        self.client.login(username="test", password="1234")
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "50"})
+        self.assertContains(response, 'title="Edit recipe"', Recipe.objects.filter(author__username="test").count())
+
     def test_recipe_list_default_pagination(self):
         response = self.client.get(reverse("recipe-list"))
         paginator = response.context_data["paginator"]
@@ -83,6 +157,42 @@ class RecipeListViewTests(TestCase):
         self.assertEqual(paginator.num_pages, math.ceil(self.num_of_recipes / 50))
         self.assertContains(response, '<option selected value="50">50</option>', html=True)
 
+    @override_settings(PAGINATE_BY_MAX=10)
+    def test_recipe_list_paginate_by_capped_and_validated(self):
+        response = self.client.get(reverse("recipe-list"), data={"paginate_by": "1000000"})
+        self.assertEqual(response.context_data["paginator"].per_page, 10)
+        for paginate_by in ("0", "-5", "abc", ""):
+            response = self.client.get(reverse("recipe-list"), data={"paginate_by": paginate_by})
+            self.assertEqual(response.context_data["paginator"].per_page, self.paginate_by)
+
+    def test_recipe_list_cursor_pagination(self):
+        expected = list(Recipe.objects.order_by("-created_date", "-id").values_list("slug", flat=True))
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("recipe-list"), data={"cursor": cursor, "paginate_by": "5"})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+            self.assertFalse(any("COUNT" in query["sql"] for query in queries.captured_queries))
+            self.assertTrue(response.context_data["is_cursor_paginated"])
+            self.assertIsNone(response.context_data["paginator"])
+            page = response.context_data["page_obj"]
+            seen.extend(recipe.slug for recipe in page)
+            cursor = page.next_cursor
+            if cursor is not None:
+                self.assertContains(response, f'<button class="page-link" type="submit" name="cursor" value="{cursor}">next</button>', 2, html=True)
+        self.assertEqual(seen, expected)
+        previous_cursor = page.previous_cursor
+        response = self.client.get(reverse("recipe-list"), data={"cursor": previous_cursor, "paginate_by": "5"})
+        self.assertEqual([recipe.slug for recipe in response.context_data["page_obj"]], expected[5:10])
+        response = self.client.get(reverse("recipe-list"), data={"cursor": response.context_data["page_obj"].previous_cursor, "paginate_by": "5"})
+        self.assertEqual([recipe.slug for recipe in response.context_data["page_obj"]], expected[:5])
+        self.assertFalse(response.context_data["page_obj"].has_previous())
+
+    def test_recipe_list_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse("recipe-list"), data={"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
     def recipe_list_set_page_and_paginate_by(self, page, paginate_by):
         max_page = math.ceil(self.num_of_recipes / paginate_by)
         if paginate_by > self.num_of_recipes:
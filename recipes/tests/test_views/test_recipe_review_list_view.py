@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from custom.testing import QueryBudgetTestMixin
+from recipes.models import Recipe, Review
+
+
+class RecipeReviewListTests(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.recipe = Recipe.objects.create(title="test", excerpt="test excerpt")
+        for i in range(25):
+            user = get_user_model().objects.create_user(
+                username=f"Test{i}", email=f"test{i}@test.com", password="Test12345"
+            )
+            Review.objects.create(author=user, recipe=self.recipe, rating=3, content=f"Review {i}")
+        self.url = reverse("recipe-reviews", kwargs={"slug": self.recipe.slug})
+
+    def test_recipe_detail_shows_first_page_with_load_more_link(self):
+        response = self.client.get(reverse("recipe-detail", kwargs={"slug": self.recipe.slug}))
+        self.assertContains(response, "Review 24")
+        self.assertContains(response, "Review 15")
+        self.assertNotContains(response, "Review 14")
+        self.assertContains(response, f'href="{self.url}?cursor=')
+
+    def test_reviews_loaded_page_by_page(self):
+        response = self.assertWithinQueryBudget(self.url, {"cursor": ""})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "Review 24")
+        self.assertNotContains(response, "Review 14")
+        contents = []
+        url = self.url
+        while url:
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+            page = response.json()
+            contents.append(page["html"])
+            url = page["next"]
+        html = "".join(contents)
+        for i in range(25):
+            self.assertEqual(html.count(f"Review {i}<"), 1)
+        self.assertEqual(len(contents), 3)
+        self.assertNotIn("Load more reviews", contents[-1])
+
+    def test_deep_page_within_query_budget(self):
+        first = self.client.get(self.url, HTTP_ACCEPT="application/json").json()
+        path, query = first["next"].split("?")
+        self.assertWithinQueryBudget(path, QueryDict(query))
+
+    def test_reviews_use_index(self):
+        self.assertQueriesUseIndexes(self.url)
+
+    def test_unknown_recipe_and_invalid_cursor_return_404(self):
+        response = self.client.get(reverse("recipe-reviews", kwargs={"slug": "missing"}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.client.get(self.url, {"cursor": "invalid"})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
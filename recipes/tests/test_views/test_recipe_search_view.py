@@ -0,0 +1,84 @@
+from http import HTTPStatus
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from custom.testing import QueryBudgetTestMixin
+from recipes.models import Recipe
+from recipes.search import PostgresSearchBackend
+
+
+class RecipeSearchViewTests(QueryBudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        Recipe.objects.create(
+            author=user,
+            title="Chickpea curry",
+            excerpt="A quick weeknight curry.",
+            ingredients="400 g chickpeas\n1 onion",
+            preparation="Fry the onion, add the chickpeas.",
+            serving="With rice.",
+        )
+        Recipe.objects.create(
+            author=user,
+            title="Hummus",
+            excerpt="Smooth and creamy.",
+            ingredients="400 g chickpeas\n2 tbsp tahini",
+            preparation="Blend everything.",
+            serving="With bread.",
+        )
+        Recipe.objects.create(
+            author=user,
+            title="Pancakes",
+            excerpt="Fluffy pancakes.",
+            ingredients="200 g flour\n2 eggs",
+            preparation="Whisk and fry.",
+            serving="With syrup.",
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse("recipe-search"), data={"q": query})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [recipe.title for recipe in response.context_data["recipes"]]
+
+    def test_get_recipe_search(self):
+        response = self.client.get(reverse("recipe-search"))
+        self.assertTemplateUsed(response, "recipes/recipe_search.html")
+        self.assertEqual(list(response.context_data["recipes"]), [])
+
+    def test_recipe_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search("chickpea"), ["Chickpea curry", "Hummus"])
+        self.assertEqual(self.search("chickpeas tahini"), ["Hummus"])
+        self.assertEqual(self.search("fluffy"), ["Pancakes"])
+        self.assertEqual(self.search("lasagne"), [])
+
+    def test_recipe_search_matches_prefix_of_last_term(self):
+        self.assertEqual(self.search("pan"), ["Pancakes"])
+
+    def test_recipe_search_index_follows_save_and_delete(self):
+        recipe = Recipe.objects.get(title="Pancakes")
+        recipe.excerpt = "Fluffy buttermilk pancakes."
+        recipe.save()
+        self.assertEqual(self.search("buttermilk"), ["Pancakes"])
+        recipe.delete()
+        self.assertEqual(self.search("buttermilk"), [])
+
+    def test_recipe_search_shows_no_results_message(self):
+        response = self.client.get(reverse("recipe-search"), data={"q": "lasagne"})
+        self.assertContains(response, '<p>No recipes found for "lasagne".</p>', html=True)
+
+    def test_recipe_search_within_query_budget(self):
+        self.assertWithinQueryBudget(reverse("recipe-search"), data={"q": "chickpeas"})
+
+
+class PostgresSearchBackendTests(SimpleTestCase):
+    def test_query_requires_all_terms_and_prefix_of_last(self):
+        connection = mock.MagicMock()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [(1,)]
+        self.assertEqual(PostgresSearchBackend(connection).search("Chickpeas, ta", 10), [1])
+        sql, params = cursor.execute.call_args.args
+        self.assertIn("to_tsquery(%s, %s)", sql)
+        self.assertEqual(params[1:], ["chickpeas & ta:*", 10])
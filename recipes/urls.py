@@ -5,8 +5,10 @@ from . import views
 urlpatterns = [
     path("", views.IndexView.as_view(), name="index"),
     path("recipes/", views.RecipeList.as_view(), name="recipe-list"),
+    path("recipes/search/", views.RecipeSearch.as_view(), name="recipe-search"),
     path("recipes/new/", views.RecipeCreate.as_view(), name="recipe-create"),
     path("recipes/recipe/<str:slug>/", views.RecipeView.as_view(), name="recipe-detail"),
+    path("recipes/recipe/<str:slug>/reviews/", views.RecipeReviewList.as_view(), name="recipe-reviews"),
     path("recipes/recipe/<str:slug>/update/", views.RecipeUpdate.as_view(), name="recipe-update"),
     path("recipes/recipe/<str:slug>/delete/", views.RecipeDelete.as_view(), name="recipe-delete"),
     path("recipes/recipe/<str:slug>/review-delete/<int:pk>", views.ReviewDelete.as_view(), name="review-delete"),
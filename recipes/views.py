@@ -1,49 +1,113 @@
 from typing import Any, Dict, Optional
 from django.db import models
 from django.forms.models import BaseModelForm
-from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+from django.views import View
 from django.views.generic import DetailView, ListView, CreateView, UpdateView, DeleteView
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse
+from django.conf import settings
 from django.views.generic.edit import FormMixin
-from django.db.models import Avg
 
+from custom.conditional import ConditionalGetMixin, page_state, page_validators
+from custom.pagination import BoundedPaginationMixin, CursorPaginator
 from recipes.models import Recipe, Review
 from recipes.forms import RecipeForm, ReviewForm
 
 
-class IndexView(ListView):
+class IndexView(ConditionalGetMixin, ListView):
     model = Recipe
     template_name = "recipes/index.html"
     context_object_name = "newest_recipes"
+    query_budget = 2
 
     def get_queryset(self):
-        queryset = Recipe.objects.all().order_by("-created_date")[:3]
+        queryset = Recipe.objects.summaries().order_by("-created_date", "-id")[:3]
         return queryset
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context["popular_recipes"] = Recipe.objects.annotate(avg_rating=Avg("reviews__rating")).order_by("-avg_rating")[:3]
+        context["popular_recipes"] = Recipe.objects.summaries().popular()[:3]
         return context
 
-class RecipeView(FormMixin, DetailView):
+    def get_validators(self, context):
+        recipes = [*context["newest_recipes"], *context["popular_recipes"]]
+        return page_validators(recipes, "modified_date", "rating_count", "rating_sum", "author__username")
+
+
+def review_page(reviews, per_page, cursor):
+    return CursorPaginator(reviews.select_related("author"), per_page, ("created_date", "id")).page(cursor)
+
+
+def next_reviews_url(slug, page):
+    if not page.has_next():
+        return None
+    return f"{reverse('recipe-reviews', kwargs={'slug': slug})}?{urlencode({'cursor': page.next_cursor})}"
+
+
+class RecipeView(ConditionalGetMixin, FormMixin, DetailView):
     model = Recipe
     template_name = "recipes/recipe_detail.html"
     context_object_name = "recipe"
     slug_field = "slug"
     form_class = ReviewForm
+    paginate_reviews_by = 10
+    query_budget = 2
+
+    def get_queryset(self):
+        return Recipe.objects.select_related("author").with_last_review_date().with_reviewer_versions()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        reviews = review_page(self.object.reviews.all(), self.paginate_reviews_by, "")
         if self.request.user.is_authenticated:
-            context["user_review"] = self.object.get_user_review(self.request.user)
-        context["reviews"] = self.object.reviews.all().order_by("-created_date")[:10]
+            context["user_review"] = self.get_user_review(reviews)
+        context["reviews"] = reviews
+        context["next_reviews_url"] = next_reviews_url(self.object.slug, reviews)
         return context
 
+    def get_user_review(self, reviews):
+        """Takes the user's review from the shown ones, and only queries for it if some reviews are not shown."""
+        user = self.request.user
+        for review in reviews:
+            if review.author_id == user.pk:
+                return review
+        if not reviews.has_next():
+            return None
+        review = self.object.get_user_review(user)
+        if review is not None:
+            review.author = user
+        return review
+
+    def get_validators(self, context=None):
+        recipe = self.object
+        author = recipe.author
+        author_version = (author.username, author.modified_date) if author else None
+        version = (
+            recipe.pk,
+            recipe.modified_date,
+            recipe.last_review_date,
+            recipe.rating_count,
+            recipe.rating_sum,
+            author_version,
+            recipe.last_reviewer_change,
+            recipe.reviewer_count,
+        )
+        timestamps = (recipe.modified_date, recipe.last_review_date, recipe.last_reviewer_change)
+        if author:
+            timestamps += (author.modified_date,)
+        return version, max(filter(None, timestamps))
+
     def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         self.object = self.get_object()
-        context = self.get_context_data(object=self.object)
-        return self.render_to_response(context)
+        response = self.not_modified_response()
+        if response is not None:
+            return response
+        return self.render_to_response(self.get_context_data(object=self.object))
 
     def post(self, request, *args, **kwargs):
         if not request.user.is_authenticated:
@@ -57,28 +121,69 @@ class RecipeView(FormMixin, DetailView):
             review.recipe = self.object
             review.author = request.user
             review.save()
-            return self.render_to_response(self.get_context_data(object=self.object))
+            messages.success(request, "Your review has been added.")
+            return redirect(self.object)
         else:
             return self.form_invalid(form)
 
 
-class RecipeList(ListView):
+class RecipeReviewList(View):
+    """
+    Serves the reviews of a recipe one keyset page at a time, as the list items
+    the detail page appends, or as JSON when the client only accepts JSON.
+    """
+
+    paginate_by = 10
+    query_budget = 2
+
+    def get(self, request, slug):
+        recipe_id = get_object_or_404(Recipe.objects.values_list("pk", flat=True), slug=slug)
+        page = review_page(Review.objects.filter(recipe_id=recipe_id), self.paginate_by, request.GET.get("cursor", ""))
+        context = {"reviews": page, "next_reviews_url": next_reviews_url(slug, page)}
+        html = render_to_string("recipes/review_page.html", context, request=request)
+        if request.accepts("application/json") and not request.accepts("text/html"):
+            return JsonResponse({"html": html, "next": context["next_reviews_url"]})
+        return HttpResponse(html)
+
+
+class RecipeList(ConditionalGetMixin, BoundedPaginationMixin, ListView):
     model = Recipe
     template_name = "recipes/recipe_list.html"
     context_object_name = "recipes"
     paginate_by = 5
-
-    def get_paginate_by(self, queryset):
-        return self.request.GET.get("paginate_by", self.paginate_by)
+    cursor_fields = ("created_date", "id")
+    cache_count = True
+    query_budget = 2
 
     def get_queryset(self):
-        queryset = Recipe.objects.all().order_by("-created_date")
+        queryset = Recipe.objects.summaries().order_by("-created_date", "-id")
         return queryset
 
-    def get(self, request, *args, **kwargs):
-        request.GET = request.GET.copy()
-        request.GET["paginate_by"] = str(self.get_paginate_by(self.get_queryset()))
-        return super().get(request, *args, **kwargs)
+    def get_validators(self, context):
+        return page_validators(
+            context["object_list"],
+            "modified_date",
+            "rating_count",
+            "rating_sum",
+            "author__username",
+            extra=page_state(context),
+        )
+
+
+class RecipeSearch(BoundedPaginationMixin, ListView):
+    model = Recipe
+    template_name = "recipes/recipe_search.html"
+    context_object_name = "recipes"
+    paginate_by = 5
+    query_budget = 2
+
+    def get_queryset(self):
+        return Recipe.objects.summaries().search(self.request.GET.get("q", ""), settings.SEARCH_RESULTS_LIMIT)
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "")
+        return context
 
 
 class RecipeCreate(LoginRequiredMixin, CreateView):
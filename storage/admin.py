@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import MediaBlob
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "ref_count", "unreferenced_since")
+    list_filter = ("ref_count",)
+    search_fields = ("name",)
+    readonly_fields = ["name", "ref_count", "unreferenced_since"]
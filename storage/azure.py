@@ -1,6 +1,8 @@
 from django.conf import settings
 from storages.backends.azure_storage import AzureStorage
 
+from storage.hashed import IMMUTABLE_CACHE_CONTROL, ContentHashedStorageMixin
+
 
 class AzureMediaStorage(AzureStorage):
     account_name = settings.AZURE_ACCOUNT_NAME
@@ -14,4 +16,8 @@ class AzureStaticStorage(AzureStorage):
     account_name = settings.AZURE_ACCOUNT_NAME
     account_key = settings.AZURE_STORAGE_KEY
     azure_container = settings.AZURE_STATIC_CONTAINER
-    expiration_secs = None
\ No newline at end of file
+    expiration_secs = None
+
+
+class HashedAzureMediaStorage(ContentHashedStorageMixin, AzureMediaStorage):
+    cache_control = IMMUTABLE_CACHE_CONTROL
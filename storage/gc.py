@@ -0,0 +1,158 @@
+import os
+import posixpath
+from datetime import datetime, timezone
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Q
+
+from custom.images import VARIANTS_DIRECTORY, manifest_variant_names, variant_source_stem
+from storage.models import MediaBlob
+
+MEDIA_FIELDS = (
+    ("recipes.Recipe", "image", "image_variants"),
+    ("accounts.CustomUser", "profile_image", "profile_image_variants"),
+)
+
+AZURE_DELETE_BATCH_SIZE = 256
+# Stems per query when matching variants to their sources; SQLite rejects much longer OR chains.
+STEM_LOOKUP_CHUNK_SIZE = 200
+
+
+def media_directories():
+    directories = {VARIANTS_DIRECTORY}
+    for model_label, field_name, manifest_field_name in MEDIA_FIELDS:
+        directories.add(str(apps.get_model(model_label)._meta.get_field(field_name).upload_to).strip("/"))
+    return sorted(directories)
+
+
+def iter_filesystem_files(storage, directory):
+    pending = [directory]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = os.scandir(storage.path(current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = posixpath.join(current, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, datetime.fromtimestamp(entry.stat().st_mtime, tz=timezone.utc)
+
+
+def azure_prefix(storage):
+    location = storage.location.strip("/")
+    return f"{location}/" if location else ""
+
+
+def iter_azure_blobs(storage, directory):
+    prefix = azure_prefix(storage)
+    # The listing is paged by the SDK, so only one page of blobs is held at a time.
+    for blob in storage.client.list_blobs(name_starts_with=f"{prefix}{directory}/", timeout=storage.timeout):
+        yield blob.name[len(prefix) :], blob.last_modified
+
+
+def iter_listed_files(storage, directory):
+    directories, files = storage.listdir(directory)
+    for file_name in files:
+        name = posixpath.join(directory, file_name)
+        yield name, storage.get_modified_time(name)
+    for subdirectory in directories:
+        yield from iter_listed_files(storage, posixpath.join(directory, subdirectory))
+
+
+def iter_stored_files(storage, directory):
+    """
+    Yields ``(name, modified time)`` for every file under ``directory`` without
+    listing the whole directory tree up front. Local and Azure storages are
+    walked natively; other storages fall back to ``listdir``.
+    """
+    if isinstance(storage, FileSystemStorage):
+        return iter_filesystem_files(storage, directory)
+    if getattr(storage, "azure_container", None):
+        return iter_azure_blobs(storage, directory)
+    return iter_listed_files(storage, directory)
+
+
+def referenced_names(names):
+    """
+    Returns the subset of ``names`` still used by a MEDIA_FIELDS row: as the
+    image itself, as a field default or as a thumbnail in the row's manifest.
+    Originals are matched by equality and variants by their source prefix, both
+    through the image field indexes, STEM_LOOKUP_CHUNK_SIZE stems per query.
+    """
+    names = set(names)
+    originals = [name for name in names if not name.startswith(f"{VARIANTS_DIRECTORY}/")]
+    stems = sorted({variant_source_stem(name) for name in names.difference(originals)})
+    referenced = set()
+    for model_label, field_name, manifest_field_name in MEDIA_FIELDS:
+        model = apps.get_model(model_label)
+        referenced.add(model._meta.get_field(field_name).default)
+        rows = model._base_manager.order_by()
+        if originals:
+            referenced.update(rows.filter(**{f"{field_name}__in": originals}).values_list(field_name, flat=True))
+        for start in range(0, len(stems), STEM_LOOKUP_CHUNK_SIZE):
+            sources = reduce(
+                or_,
+                (
+                    Q(**{field_name: stem}) | Q(**{f"{field_name}__startswith": f"{stem}."})
+                    for stem in stems[start : start + STEM_LOOKUP_CHUNK_SIZE]
+                ),
+            )
+            for manifest in rows.filter(sources).values_list(manifest_field_name, flat=True).iterator():
+                referenced.update(manifest_variant_names(manifest))
+    return names & referenced
+
+
+def blob_protected_names(names, older_than):
+    """
+    Returns the subset of ``names`` whose MediaBlob is still counted, or was
+    released after ``older_than``. A content-hashed upload that reuses an old
+    file keeps the file's old modified time, so the blob is what shows that the
+    content was in use recently.
+    """
+    return set(
+        MediaBlob.objects.filter(name__in=names)
+        .filter(Q(ref_count__gt=0) | Q(unreferenced_since__isnull=True) | Q(unreferenced_since__gte=older_than))
+        .values_list("name", flat=True)
+    )
+
+
+def delete_files(storage, names):
+    if getattr(storage, "azure_container", None):
+        prefix = azure_prefix(storage)
+        for start in range(0, len(names), AZURE_DELETE_BATCH_SIZE):
+            batch = names[start : start + AZURE_DELETE_BATCH_SIZE]
+            storage.client.delete_blobs(*(f"{prefix}{name}" for name in batch), timeout=storage.timeout)
+    else:
+        for name in names:
+            storage.delete(name)
+    MediaBlob.objects.filter(name__in=names, ref_count=0).delete()
+
+
+def collect_orphans(storage, older_than, batch_size, dry_run=False):
+    """
+    Streams the media directories of ``storage`` in batches of ``batch_size``
+    files and deletes the ones no row references. Files modified after
+    ``older_than`` are kept: they may belong to an upload or a variant job whose
+    row is not committed yet. So are files whose MediaBlob is still counted or
+    was released after ``older_than``. Yields ``(listed, orphans)`` for every
+    batch.
+    """
+    for directory in media_directories():
+        files = iter_stored_files(storage, directory)
+        while batch := list(islice(files, batch_size)):
+            candidates = [name for name, modified_time in batch if modified_time < older_than]
+            orphans = set(candidates) - referenced_names(candidates) if candidates else set()
+            if orphans:
+                orphans -= blob_protected_names(orphans, older_than)
+            orphans = sorted(orphans)
+            if orphans and not dry_run:
+                delete_files(storage, orphans)
+            yield len(batch), orphans
@@ -0,0 +1,73 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CONTENT_HASHED_NAME = re.compile(r"(^|/)[0-9a-f]{64}(\.\w+)?$")
+
+
+class ContentAlreadyStored(Exception):
+    pass
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if content.seekable():
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    if content.seekable():
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_hashed(name):
+    return bool(CONTENT_HASHED_NAME.search(name))
+
+
+class ContentHashedStorageMixin:
+    """
+    Names every saved file after the SHA-256 of its content, keeping the
+    directory and the lowercased extension of the requested name. Saving content
+    that is already stored uploads nothing and returns the existing name, so a
+    file is stored once however many fields reference it, and a name never
+    points to different content, which lets the files be cached forever.
+    """
+
+    content_hashed = True
+
+    def hashed_name(self, name, content):
+        directory, filename = posixpath.split(name.replace("\\", "/"))
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, content_hash(content) + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        try:
+            return super().save(name, content, max_length=max_length)
+        except ContentAlreadyStored:
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f'Storage can not find an available filename for "{name}". '
+                "Please make sure that the corresponding file field "
+                'allows sufficient "max_length".'
+            )
+        if self.exists(name):
+            raise ContentAlreadyStored(name)
+        return super().get_available_name(name, max_length=max_length)
+
+
+class HashedFileSystemStorage(ContentHashedStorageMixin, FileSystemStorage):
+    pass
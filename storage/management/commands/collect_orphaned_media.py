@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from storage.gc import collect_orphans
+
+
+class Command(BaseCommand):
+    help = "Deletes media files that no recipe or user references any more, streaming the storage in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report orphaned files without deleting them.")
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.MEDIA_GC_BATCH_SIZE, help="Files checked per database query."
+        )
+        parser.add_argument(
+            "--grace-period",
+            type=int,
+            default=settings.MEDIA_GC_GRACE_PERIOD,
+            help="Seconds a file must have existed before it can be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(seconds=options["grace_period"])
+        listed = orphaned = 0
+        for batch_size, orphans in collect_orphans(
+            default_storage, older_than, options["batch_size"], dry_run=options["dry_run"]
+        ):
+            listed += batch_size
+            orphaned += len(orphans)
+            if options["verbosity"] > 1:
+                for name in orphans:
+                    self.stdout.write(name)
+        action = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{action} {orphaned} orphaned file(s) out of {listed}."))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.3 on 2026-10-18 01:11
+
+from django.db import migrations
+from django.db.models import Count
+
+MEDIA_FIELDS = [
+    ("recipes", "Recipe", "image"),
+    ("accounts", "CustomUser", "profile_image"),
+]
+
+
+def count_media_references(apps, schema_editor):
+    MediaBlob = apps.get_model("storage", "MediaBlob")
+    ref_counts = {}
+    for app_label, model_name, field_name in MEDIA_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        default = model._meta.get_field(field_name).default
+        names = model._base_manager.exclude(**{field_name: ""}).exclude(**{field_name: default})
+        for row in names.values(field_name).annotate(references=Count("pk")).order_by().iterator():
+            name = row[field_name]
+            ref_counts[name] = ref_counts.get(name, 0) + row["references"]
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, ref_count=ref_count) for name, ref_count in ref_counts.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0001_initial'),
+        ('recipes', '0013_recipe_image_variants'),
+        ('accounts', '0007_customuser_profile_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(count_media_references, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class MediaBlob(models.Model):
+    """
+    Counts the model fields that reference a stored file. Content-hashed storages
+    give identical uploads the same name, so one blob can back many fields.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    unreferenced_since = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ref_count", "unreferenced_since"], name="mediablob_unreferenced_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+    @classmethod
+    def acquire(cls, name):
+        if cls.objects.filter(name=name).update(ref_count=F("ref_count") + 1, unreferenced_since=None):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, ref_count=1)
+        except IntegrityError:
+            cls.objects.filter(name=name).update(ref_count=F("ref_count") + 1, unreferenced_since=None)
+
+    @classmethod
+    def release(cls, name):
+        """
+        Drops one reference. Files are never deleted here: an upload of the same
+        content may be reusing the file right now, so removal is left to the
+        garbage collector once the blob has been unreferenced for a while.
+        """
+        cls.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+        cls.objects.filter(name=name, ref_count=0, unreferenced_since__isnull=True).update(
+            unreferenced_since=timezone.now()
+        )
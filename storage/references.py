@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+
+from storage.models import MediaBlob
+
+ORIGINAL_NAMES = "_original_media_names"
+
+
+def tracked_name(field, name):
+    if not name or name == field.default:
+        return None
+    return name
+
+
+def loaded_name(instance, field):
+    value = instance.__dict__[field.attname]
+    return getattr(value, "name", value)
+
+
+def track_media_references(model, field_name):
+    """
+    Keeps the MediaBlob reference counts in step with a file field of ``model``.
+    The name a row was loaded with is remembered, so only saves that change the
+    file touch the counts; fields left deferred are never loaded for this.
+    """
+    field = model._meta.get_field(field_name)
+    uid = f"{model._meta.label_lower}.{field_name}"
+
+    def remember_name(sender, instance, **kwargs):
+        if field.attname in instance.__dict__:
+            names = instance.__dict__.setdefault(ORIGINAL_NAMES, {})
+            names[field_name] = tracked_name(field, loaded_name(instance, field))
+
+    def load_original_name(sender, instance, **kwargs):
+        names = instance.__dict__.setdefault(ORIGINAL_NAMES, {})
+        if instance._state.adding:
+            names[field_name] = None
+        elif field_name not in names and field.attname in instance.__dict__:
+            name = model._base_manager.filter(pk=instance.pk).values_list(field.attname, flat=True).first()
+            names[field_name] = tracked_name(field, name)
+
+    def update_references(sender, instance, **kwargs):
+        names = instance.__dict__.setdefault(ORIGINAL_NAMES, {})
+        if field.attname not in instance.__dict__:
+            return
+        old_name, new_name = names.get(field_name), tracked_name(field, loaded_name(instance, field))
+        if old_name != new_name:
+            if new_name:
+                MediaBlob.acquire(new_name)
+            if old_name:
+                MediaBlob.release(old_name)
+        names[field_name] = new_name
+
+    def release_reference(sender, instance, **kwargs):
+        names = instance.__dict__.get(ORIGINAL_NAMES, {})
+        if field_name in names:
+            name = names[field_name]
+        elif field.attname in instance.__dict__:
+            name = tracked_name(field, loaded_name(instance, field))
+        else:
+            return
+        if name:
+            MediaBlob.release(name)
+
+    post_init.connect(remember_name, sender=model, weak=False, dispatch_uid=uid)
+    pre_save.connect(load_original_name, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(update_references, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(release_reference, sender=model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,104 @@
+import hashlib
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from recipes.models import Recipe
+from storage.hashed import IMMUTABLE_CACHE_CONTROL, HashedFileSystemStorage
+from storage.models import MediaBlob
+from storage.views import serve_media
+
+CONTENT = b"image content"
+HASHED_NAME = f"images/{hashlib.sha256(CONTENT).hexdigest()}.jpg"
+
+
+def upload(name="photo.jpg", content=CONTENT):
+    return SimpleUploadedFile(name=name, content=content, content_type="image/jpeg")
+
+
+class HashedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={**settings.STORAGES, "default": {"BACKEND": "storage.hashed.HashedFileSystemStorage"}},
+        )
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_files_named_by_content(self):
+        storage = HashedFileSystemStorage(location=self.media_root)
+        self.assertEqual(storage.save("images/Photo.JPG", ContentFile(CONTENT)), HASHED_NAME)
+        self.assertEqual(storage.save("images/other.jpg", ContentFile(CONTENT)), HASHED_NAME)
+        self.assertEqual(storage.listdir("images"), ([], [HASHED_NAME.split("/")[1]]))
+        self.assertNotEqual(storage.save("images/other.jpg", ContentFile(b"other content")), HASHED_NAME)
+
+    def test_identical_uploads_share_one_blob(self):
+        first = Recipe.objects.create(title="first recipe", excerpt="test", image=upload())
+        user = get_user_model().objects.create_user(username="test", email="test@test.com", password="1234")
+        user.profile_image = upload("avatar.jpg")
+        user.save()
+        self.assertEqual(first.image.name, HASHED_NAME)
+        self.assertEqual(user.profile_image.name, HASHED_NAME)
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+        self.assertTrue(default_storage.exists(HASHED_NAME))
+
+    def test_replaced_and_deleted_images_release_their_blob(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=upload())
+        recipe.image = upload(content=b"new content")
+        recipe.save()
+        old_blob = MediaBlob.objects.get(name=HASHED_NAME)
+        self.assertEqual(old_blob.ref_count, 0)
+        self.assertIsNotNone(old_blob.unreferenced_since)
+        recipe.title = "new title"
+        recipe.save()
+        self.assertEqual(MediaBlob.objects.get(name=recipe.image.name).ref_count, 1)
+        Recipe.objects.get(pk=recipe.pk).delete()
+        self.assertEqual(MediaBlob.objects.get(name=recipe.image.name).ref_count, 0)
+
+    def test_reuploaded_content_is_referenced_again(self):
+        recipe = Recipe.objects.create(title="test recipe", excerpt="test", image=upload())
+        recipe.image = "images/default.jpg"
+        recipe.save()
+        recipe.image = upload()
+        recipe.save()
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.ref_count, 1)
+        self.assertIsNone(blob.unreferenced_since)
+
+    def test_default_image_is_not_counted(self):
+        Recipe.objects.create(title="test recipe", excerpt="test")
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_hashed_media_cached_forever(self):
+        default_storage.save("images/photo.jpg", ContentFile(CONTENT))
+        FileSystemStorage(location=self.media_root).save("images/default.jpg", ContentFile(CONTENT))
+        request = RequestFactory().get("/media/")
+        response = serve_media(request, HASHED_NAME, document_root=self.media_root)
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        response = serve_media(request, "images/default.jpg", document_root=self.media_root)
+        self.assertNotIn("Cache-Control", response)
+
+
+class MediaBlobTests(TestCase):
+    def test_reference_counting(self):
+        MediaBlob.acquire("images/a.jpg")
+        MediaBlob.acquire("images/a.jpg")
+        MediaBlob.release("images/a.jpg")
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        MediaBlob.release("images/a.jpg")
+        MediaBlob.release("images/a.jpg")
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.ref_count, 0)
+        self.assertLess(timezone.now() - blob.unreferenced_since, timedelta(minutes=1))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.queue import run_pending_jobs
+from recipes.models import Recipe
+from recipes.tests.test_image_variants import jpeg_upload
+from storage.gc import referenced_names
+from storage.hashed import HashedFileSystemStorage
+from storage.models import MediaBlob
+
+
+class CollectOrphanedMediaTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_VARIANTS_ENABLED=True, IMAGE_VARIANT_SIZES=[80]
+        )
+        self.settings_override.enable()
+        default_storage.save("images/default.jpg", ContentFile(b"default"))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def age_files(self, seconds=2 * 24 * 60 * 60):
+        past = time.time() - seconds
+        for directory, _, files in os.walk(self.media_root):
+            for file_name in files:
+                os.utime(os.path.join(directory, file_name), (past, past))
+        MediaBlob.objects.filter(unreferenced_since__isnull=False).update(
+            unreferenced_since=timezone.now() - timedelta(seconds=seconds)
+        )
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command("collect_orphaned_media", *args, verbosity=2, stdout=out)
+        return out.getvalue()
+
+    def create_recipes(self):
+        Recipe.objects.create(title="kept recipe", excerpt="test", image=jpeg_upload("kept.jpg"))
+        replaced = Recipe.objects.create(title="replaced recipe", excerpt="test", image=jpeg_upload("old.jpg"))
+        deleted = Recipe.objects.create(title="deleted recipe", excerpt="test", image=jpeg_upload("deleted.jpg"))
+        run_pending_jobs()
+        replaced.image = jpeg_upload("new.jpg")
+        replaced.save()
+        run_pending_jobs()
+        deleted.delete()
+
+    def test_orphans_deleted(self):
+        self.create_recipes()
+        self.age_files()
+        output = self.collect()
+        self.assertIn("Deleted 6 orphaned file(s) out of 13.", output)
+        self.assertIn("variants/images/deleted/80.jpeg", output)
+        for name in ("images/old.jpg", "images/deleted.jpg", "variants/images/old/80.jpeg"):
+            self.assertFalse(default_storage.exists(name), name)
+        for name in ("images/default.jpg", "images/kept.jpg", "images/new.jpg", "variants/images/kept/80.jpeg"):
+            self.assertTrue(default_storage.exists(name), name)
+        self.assertFalse(MediaBlob.objects.filter(name="images/old.jpg").exists())
+
+    def test_dry_run_deletes_nothing(self):
+        self.create_recipes()
+        self.age_files()
+        output = self.collect("--dry-run", "--batch-size=1")
+        self.assertIn("images/old.jpg", output)
+        self.assertIn("Found 6 orphaned file(s) out of 13.", output)
+        self.assertTrue(default_storage.exists("images/old.jpg"))
+
+    def test_recent_files_kept(self):
+        self.create_recipes()
+        self.assertIn("Deleted 0 orphaned file(s) out of 13.", self.collect())
+        self.age_files(60)
+        self.assertIn("Deleted 6 orphaned file(s)", self.collect("--grace-period=30"))
+
+    def test_deduplicated_upload_in_flight_kept(self):
+        storage = HashedFileSystemStorage(location=self.media_root)
+        name = storage.save("images/photo.jpg", ContentFile(b"photo"))
+        MediaBlob.acquire(name)
+        self.age_files()
+        # The only row referencing the file lets go of it just as an identical upload reuses the old file.
+        MediaBlob.release(name)
+        self.assertEqual(storage.save("images/again.jpg", ContentFile(b"photo")), name)
+        self.assertNotIn(name, self.collect())
+        self.assertTrue(default_storage.exists(name))
+        self.age_files()
+        self.assertIn(name, self.collect())
+        self.assertFalse(default_storage.exists(name))
+
+    def test_counted_blob_kept(self):
+        default_storage.save("images/pending.jpg", ContentFile(b"pending"))
+        MediaBlob.acquire("images/pending.jpg")
+        self.age_files()
+        self.assertNotIn("images/pending.jpg", self.collect())
+        self.assertTrue(default_storage.exists("images/pending.jpg"))
+
+    def test_many_variant_stems_in_one_batch(self):
+        recipe = Recipe.objects.create(title="kept recipe", excerpt="test", image=jpeg_upload("kept.jpg"))
+        run_pending_jobs()
+        recipe.refresh_from_db()
+        kept = recipe.image_variants["variants"]["jpeg"]["80"]
+        names = [f"variants/images/orphan-{i}/80.jpeg" for i in range(600)] + [kept]
+        self.assertEqual(referenced_names(names), {kept})
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+FAILED = ""
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.STORAGE_URL_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_urls = LRUCache()
+
+
+def storage_key(storage, name):
+    storage_class = type(storage)
+    location = getattr(storage, "azure_container", None) or getattr(storage, "base_url", "")
+    return f"{storage_class.__module__}.{storage_class.__qualname__}:{location}:{name}"
+
+
+def shared_cache():
+    if settings.STORAGE_URL_SHARED_CACHE:
+        return caches[settings.STORAGE_URL_SHARED_CACHE]
+    return None
+
+
+def shared_key(key):
+    return f"storage-url:{md5(key.encode(), usedforsecurity=False).hexdigest()}"
+
+
+def url_timeout(storage):
+    # Signed URLs must be dropped well before they expire.
+    expiration_secs = getattr(storage, "expiration_secs", None)
+    if expiration_secs:
+        return min(settings.STORAGE_URL_CACHE_TIMEOUT, expiration_secs // 2)
+    return settings.STORAGE_URL_CACHE_TIMEOUT
+
+
+def cached_url(storage, name):
+    """
+    Returns ``storage.url(name)`` from the in-process LRU, then from the
+    STORAGE_URL_SHARED_CACHE cache if one is configured, and only then from the
+    storage. Returns None for an empty name or when the storage fails; failures
+    are remembered for STORAGE_URL_FAILURE_TIMEOUT seconds so a broken storage
+    does not slow down every render.
+    """
+    if not name:
+        return None
+    key = storage_key(storage, name)
+    url = local_urls.get(key)
+    if url is None and (shared := shared_cache()) is not None:
+        url = shared.get(shared_key(key))
+        if url is not None:
+            local_urls.set(key, url, url_timeout(storage) if url else settings.STORAGE_URL_FAILURE_TIMEOUT)
+    if url is None:
+        try:
+            url, timeout = storage.url(name), url_timeout(storage)
+        except Exception:
+            logger.exception("Could not resolve the URL of %s", name)
+            url, timeout = FAILED, settings.STORAGE_URL_FAILURE_TIMEOUT
+        local_urls.set(key, url, timeout)
+        if (shared := shared_cache()) is not None:
+            shared.set(shared_key(key), url, timeout)
+    return url or None
+
+
+def invalidate_url(storage, name):
+    if not name:
+        return
+    key = storage_key(storage, name)
+    local_urls.delete(key)
+    if (shared := shared_cache()) is not None:
+        shared.delete(shared_key(key))
@@ -0,0 +1,11 @@
+from django.views.static import serve
+
+from storage.hashed import IMMUTABLE_CACHE_CONTROL, is_content_hashed
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """Development media view; content-hashed files never change, so they are cached for good."""
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code == 200 and is_content_hashed(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response